@@ -14,6 +14,8 @@ if config.config_file_name is not None:
 # target_metadata = None
 
 from app.db.database import Base  # Updated import
+from app.db.migrations import stamp_if_unversioned
+from app.models import idempotency, movie, profile, user_role  # noqa: F401
 
 target_metadata = Base.metadata
 
@@ -44,6 +46,8 @@ def run_migrations_online() -> None:
         context.configure(connection=connection, target_metadata=target_metadata)
 
         with context.begin_transaction():
+            # A database init_db built without a version is taken as at head.
+            stamp_if_unversioned(connection, target_metadata)
             context.run_migrations()
 
     async def run_async_migrations():
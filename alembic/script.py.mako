@@ -5,11 +5,12 @@ Revises: ${down_revision | comma,n}
 Create Date: ${create_date}
 
 """
+
 from typing import Sequence, Union
 
-from alembic import op
 import sqlalchemy as sa
 ${imports if imports else ""}
+from alembic import op
 
 # revision identifiers, used by Alembic.
 revision: str = ${repr(up_revision)}
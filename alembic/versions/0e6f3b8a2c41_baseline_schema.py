@@ -0,0 +1,80 @@
+"""baseline schema
+
+Revision ID: 0e6f3b8a2c41
+Revises:
+Create Date: 2026-10-18 09:48:15.273904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0e6f3b8a2c41"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The schema init_db created before migrations were introduced. Databases
+    # that already have it keep their tables.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("movies"):
+        op.create_table(
+            "movies",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("genre", sa.String(), nullable=True),
+            sa.Column("director", sa.String(), nullable=True),
+            sa.Column("release_year", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_movies_id", "movies", ["id"])
+        op.create_index("ix_movies_title", "movies", ["title"])
+        op.create_index("ix_movies_genre", "movies", ["genre"])
+        op.create_index("ix_movies_director", "movies", ["director"])
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column(
+                "role", sa.Enum("basic", "premium", name="userrole"), nullable=False
+            ),
+            sa.Column("totp_secret", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+    if not inspector.has_table("profiles"):
+        op.create_table(
+            "profiles",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("bio", sa.String(), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_profiles_id", "profiles", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_profiles_id", table_name="profiles")
+    op.drop_table("profiles")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
+    op.drop_index("ix_movies_director", table_name="movies")
+    op.drop_index("ix_movies_genre", table_name="movies")
+    op.drop_index("ix_movies_title", table_name="movies")
+    op.drop_index("ix_movies_id", table_name="movies")
+    op.drop_table("movies")
@@ -0,0 +1,52 @@
+"""unique movie title and keyset pagination indexes
+
+Revision ID: 3b1f6c2d9a40
+Revises: 0e6f3b8a2c41
+Create Date: 2026-10-18 10:12:41.503182
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b1f6c2d9a40"
+down_revision: Union[str, None] = "0e6f3b8a2c41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    # Titles become unique. The first movie of each repeated title keeps it;
+    # the others are renamed "<title> (<id>)", never dropped. A renamed title
+    # that is taken as well makes the unique index below fail the upgrade.
+    connection = op.get_bind()
+    duplicates = connection.execute(
+        sa.text(
+            "SELECT id, title FROM movies WHERE title IS NOT NULL AND id NOT IN "
+            "(SELECT min(id) FROM movies WHERE title IS NOT NULL GROUP BY title) "
+            "ORDER BY id"
+        )
+    ).all()
+    movies = sa.table("movies", sa.column("id"), sa.column("title"))
+    for movie_id, title in duplicates:
+        renamed = f"{title} ({movie_id})"
+        logger.warning(f"Renaming movie {movie_id} from {title!r} to {renamed!r}")
+        op.execute(movies.update().where(movies.c.id == movie_id).values(title=renamed))
+    op.drop_index("ix_movies_title", table_name="movies")
+    op.create_index("ix_movies_title", "movies", ["title"], unique=True)
+    op.create_index("ix_movies_title_id", "movies", ["title", "id"])
+    op.create_index("ix_movies_release_year_id", "movies", ["release_year", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_movies_release_year_id", table_name="movies")
+    op.drop_index("ix_movies_title_id", table_name="movies")
+    op.drop_index("ix_movies_title", table_name="movies")
+    op.create_index("ix_movies_title", "movies", ["title"], unique=False)
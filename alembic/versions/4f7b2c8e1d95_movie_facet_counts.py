@@ -0,0 +1,47 @@
+"""movie facet counts
+
+Revision ID: 4f7b2c8e1d95
+Revises: c5d0e9f1a6b2
+Create Date: 2026-10-18 18:41:09.512337
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4f7b2c8e1d95"
+down_revision: Union[str, None] = "c5d0e9f1a6b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "movie_facets",
+        sa.Column("facet", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("facet", "value"),
+    )
+    op.create_index("ix_movie_facets_facet_count", "movie_facets", ["facet", "count"])
+    # Seed the counts once; from here on the application keeps them current.
+    op.execute(
+        "INSERT INTO movie_facets (facet, value, count) "
+        "SELECT 'genre', genre, count(*) FROM movies "
+        "WHERE genre IS NOT NULL GROUP BY genre "
+        "UNION ALL "
+        "SELECT 'decade', CAST(release_year / 10 * 10 AS VARCHAR) || 's', count(*) "
+        "FROM movies WHERE release_year IS NOT NULL GROUP BY release_year / 10 * 10 "
+        "UNION ALL "
+        "SELECT 'director', director, count(*) FROM movies "
+        "WHERE director IS NOT NULL GROUP BY director"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_movie_facets_facet_count", table_name="movie_facets")
+    op.drop_table("movie_facets")
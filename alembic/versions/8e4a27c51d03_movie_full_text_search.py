@@ -0,0 +1,66 @@
+"""movie full-text search
+
+Revision ID: 8e4a27c51d03
+Revises: 3b1f6c2d9a40
+Create Date: 2026-10-18 14:36:02.118734
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8e4a27c51d03"
+down_revision: Union[str, None] = "3b1f6c2d9a40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute(
+            "ALTER TABLE movies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+            "(to_tsvector('english', coalesce(title, '') || ' ' || "
+            "coalesce(director, ''))) STORED"
+        )
+        op.execute(
+            "CREATE INDEX ix_movies_search_vector ON movies USING gin (search_vector)"
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE movies_fts USING fts5("
+            "title, director, content='movies', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER movies_fts_insert AFTER INSERT ON movies BEGIN "
+            "INSERT INTO movies_fts(rowid, title, director) "
+            "VALUES (new.id, new.title, new.director); END"
+        )
+        op.execute(
+            "CREATE TRIGGER movies_fts_delete AFTER DELETE ON movies BEGIN "
+            "INSERT INTO movies_fts(movies_fts, rowid, title, director) "
+            "VALUES ('delete', old.id, old.title, old.director); END"
+        )
+        op.execute(
+            "CREATE TRIGGER movies_fts_update AFTER UPDATE ON movies BEGIN "
+            "INSERT INTO movies_fts(movies_fts, rowid, title, director) "
+            "VALUES ('delete', old.id, old.title, old.director); "
+            "INSERT INTO movies_fts(rowid, title, director) "
+            "VALUES (new.id, new.title, new.director); END"
+        )
+        op.execute("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_movies_search_vector", table_name="movies")
+        op.drop_column("movies", "search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("movies_fts_insert", "movies_fts_delete", "movies_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS movies_fts")
@@ -0,0 +1,97 @@
+"""normalize movie genres
+
+Revision ID: 9a6d3e4b7f21
+Revises: 4f7b2c8e1d95
+Create Date: 2026-10-18 19:27:44.103958
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a6d3e4b7f21"
+down_revision: Union[str, None] = "4f7b2c8e1d95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    op.create_table(
+        "genres",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("label", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    # One genre per case-folded name, labelled with one of its spellings.
+    # Folded in Python: SQL lower() is ASCII-only on SQLite and differs from
+    # the str.casefold() of canonical_genre elsewhere (e.g. "ß" and "ss").
+    spellings = (
+        connection.execute(
+            sa.text("SELECT DISTINCT genre FROM movies WHERE genre IS NOT NULL")
+        )
+        .scalars()
+        .all()
+    )
+    labels = {}
+    for spelling in spellings:
+        name = spelling.strip().casefold()
+        labels[name] = min(labels.get(name, spelling.strip()), spelling.strip())
+    genres = sa.table("genres", sa.column("name"), sa.column("label"))
+    if labels:
+        op.bulk_insert(
+            genres,
+            [{"name": name, "label": label} for name, label in sorted(labels.items())],
+        )
+
+    if dialect == "sqlite":
+        # SQLite cannot add a constraint to an existing table, but accepts an
+        # inline REFERENCES on a new column.
+        op.execute(
+            "ALTER TABLE movies ADD COLUMN genre_id INTEGER REFERENCES genres (id)"
+        )
+    else:
+        op.add_column("movies", sa.Column("genre_id", sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            "movies_genre_id_fkey", "movies", "genres", ["genre_id"], ["id"]
+        )
+    ids = dict(connection.execute(sa.text("SELECT name, id FROM genres")).all())
+    movies = sa.table("movies", sa.column("genre"), sa.column("genre_id"))
+    for spelling in spellings:
+        op.execute(
+            movies.update()
+            .where(movies.c.genre == spelling)
+            .values(genre_id=ids[spelling.strip().casefold()])
+        )
+    op.create_index("ix_movies_genre_id", "movies", ["genre_id"])
+    op.drop_index("ix_movies_genre", table_name="movies")
+    op.drop_column("movies", "genre")
+
+    # Spellings that differed only in case are now one genre.
+    op.execute("DELETE FROM movie_facets WHERE facet = 'genre'")
+    op.execute(
+        "INSERT INTO movie_facets (facet, value, count) "
+        "SELECT 'genre', genres.label, count(*) FROM movies "
+        "JOIN genres ON genres.id = movies.genre_id GROUP BY genres.label"
+    )
+
+
+def downgrade() -> None:
+    op.add_column("movies", sa.Column("genre", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE movies SET genre = "
+        "(SELECT label FROM genres WHERE genres.id = movies.genre_id)"
+    )
+    op.create_index("ix_movies_genre", "movies", ["genre"])
+    op.drop_index("ix_movies_genre_id", table_name="movies")
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint("movies_genre_id_fkey", "movies", type_="foreignkey")
+    op.drop_column("movies", "genre_id")
+    op.drop_table("genres")
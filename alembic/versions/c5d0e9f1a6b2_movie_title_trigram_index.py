@@ -0,0 +1,33 @@
+"""movie title trigram index
+
+Revision ID: c5d0e9f1a6b2
+Revises: 8e4a27c51d03
+Create Date: 2026-10-18 16:02:27.940215
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d0e9f1a6b2"
+down_revision: Union[str, None] = "8e4a27c51d03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_movies_title_trgm ON movies "
+            "USING gin (title gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_movies_title_trgm", table_name="movies")
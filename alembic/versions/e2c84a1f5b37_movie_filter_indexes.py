@@ -0,0 +1,43 @@
+"""movie filter indexes
+
+Revision ID: e2c84a1f5b37
+Revises: 9a6d3e4b7f21
+Create Date: 2026-10-18 20:12:51.660214
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2c84a1f5b37"
+down_revision: Union[str, None] = "9a6d3e4b7f21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The trailing id is the keyset tie-breaker of the release year sort.
+    op.create_index(
+        "ix_movies_genre_id_release_year",
+        "movies",
+        ["genre_id", "release_year", "id"],
+    )
+    op.create_index(
+        "ix_movies_director_release_year",
+        "movies",
+        ["director", "release_year", "id"],
+    )
+    # Both lead with the column of a single-column index, which they replace.
+    op.drop_index("ix_movies_genre_id", table_name="movies")
+    op.drop_index("ix_movies_director", table_name="movies")
+
+
+def downgrade() -> None:
+    op.create_index("ix_movies_director", "movies", ["director"])
+    op.create_index("ix_movies_genre_id", "movies", ["genre_id"])
+    op.drop_index("ix_movies_director_release_year", table_name="movies")
+    op.drop_index("ix_movies_genre_id_release_year", table_name="movies")
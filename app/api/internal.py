@@ -0,0 +1,159 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.api import profiler
+from app.api.profiler import RENDERERS, FlameGraphFormat, ProfileFormat, profiles
+from app.db.database import engine, replica_engines
+from app.db.pool import pool_status
+from app.security import principals
+from app.security.api_key import require_internal_caller
+from app.security.passwords import password_hasher
+from app.services.movies_services import MovieService
+
+router = APIRouter(dependencies=[Depends(require_internal_caller)])
+
+
+@router.get(
+    "/cache",
+    summary="Movie cache statistics",
+    description="Hit, miss, eviction and invalidation counters of the movie cache.",
+)
+async def get_cache_stats():
+    cache = MovieService.cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "backend": type(cache).__name__, **asdict(cache.stats)}
+
+
+@router.get(
+    "/reads",
+    summary="Movie read coalescing statistics",
+    description="How many movie reads ran and how many joined one already in flight.",
+)
+async def get_read_stats():
+    reads = MovieService.reads
+    if reads is None:
+        return {"enabled": False}
+    return {"enabled": True, "in_flight": len(reads), **asdict(reads.stats)}
+
+
+@router.get(
+    "/writes",
+    summary="Movie write batching statistics",
+    description="How many movie creations were grouped into how many commits.",
+)
+async def get_write_stats():
+    writes = MovieService.writes
+    if writes is None:
+        return {"enabled": False}
+    return {"enabled": True, "waiting": len(writes), **asdict(writes.stats)}
+
+
+@router.get(
+    "/principals",
+    summary="Principal cache statistics",
+    description="Hits, misses and invalidations of the cache of users resolved "
+    "from access tokens.",
+)
+async def get_principal_stats():
+    cache = principals.principal_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "entries": len(cache), **asdict(cache.stats)}
+
+
+@router.get(
+    "/passwords",
+    summary="Password hashing statistics",
+    description="Queued and running bcrypt hashes, queue wait times and hashes "
+    "rejected because the queue was full.",
+)
+async def get_password_stats():
+    return {
+        "workers": password_hasher.workers,
+        "max_queued": password_hasher.max_queued,
+        "bcrypt_rounds": password_hasher.context.to_dict().get("bcrypt__rounds"),
+        **asdict(password_hasher.stats),
+    }
+
+
+@router.get(
+    "/db/pool",
+    summary="Database connection pool statistics",
+    description="Checked-out and idle connections, overflow, checkout wait times "
+    "and checkout timeouts of the primary and replica pools.",
+)
+async def get_pool_stats():
+    return {
+        "primary": pool_status(engine),
+        "replicas": [pool_status(replica) for replica in replica_engines],
+    }
+
+
+@router.get(
+    "/profiles",
+    summary="Recent request profiles",
+    description="The latest profiled requests of each route template; requests "
+    "are profiled when sent with X-Profile: 1 or picked by sampling.",
+)
+async def get_profiles():
+    return profiles.by_route()
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    summary="A request profile",
+    description="One recent profile rendered as a pyinstrument HTML page or as "
+    "speedscope JSON.",
+    responses={404: {"description": "Profile not found or no longer kept"}},
+)
+async def get_profile(profile_id: int, format: ProfileFormat = ProfileFormat.html):
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}.")
+    rendered = await run_in_threadpool(RENDERERS[format]().render, profile.session)
+    if format is ProfileFormat.html:
+        return HTMLResponse(rendered)
+    return Response(rendered, media_type="application/json")
+
+
+@router.get(
+    "/flamegraphs",
+    summary="Continuously sampled routes",
+    description="Samples per route template within the continuous profiler's "
+    "rolling window.",
+)
+async def get_flamegraphs():
+    sampler = profiler.stack_sampler
+    if sampler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "rate_hz": sampler.rate,
+        "window_seconds": sampler.window_seconds,
+        "samples_total": sampler.samples,
+        "routes": sampler.routes(),
+    }
+
+
+@router.get(
+    "/flamegraphs/export",
+    summary="Aggregated flame graph",
+    description="The stacks sampled within the rolling window, merged per route "
+    "template, as collapsed stacks or speedscope JSON; every route unless one "
+    "is given, e.g. `GET /v1/movies/{movie_id}`.",
+    responses={404: {"description": "Continuous profiling is off"}},
+)
+async def export_flamegraph(
+    format: FlameGraphFormat = FlameGraphFormat.collapsed, route: str | None = None
+):
+    sampler = profiler.stack_sampler
+    if sampler is None:
+        raise HTTPException(status_code=404, detail="Continuous profiling is off.")
+    rendered = await run_in_threadpool(sampler.render, format, route)
+    if format is FlameGraphFormat.speedscope:
+        return Response(rendered, media_type="application/json")
+    return PlainTextResponse(rendered)
@@ -1,11 +1,29 @@
+import itertools
+import json
 import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
 
 from fastapi import FastAPI
 from pyinstrument import Profiler
-from pyinstrument.renderers import SpeedscopeRenderer
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+from pyinstrument.session import Session
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.security.api_key import is_internal_caller
+
+# Requests carrying this header are profiled whatever the sampling rate.
+PROFILE_HEADER = "x-profile"
 
 profiler = Profiler(interval=0.0001, async_mode="enabled")
 
@@ -18,15 +36,383 @@ async def lifespan(app: FastAPI):
     profiler.write_html(os.getcwd() + "/profiler.html")
 
 
+class ProfileFormat(str, Enum):
+    html = "html"
+    speedscope = "speedscope"
+
+
+RENDERERS = {
+    ProfileFormat.html: HTMLRenderer,
+    ProfileFormat.speedscope: SpeedscopeRenderer,
+}
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    route: str
+    method: str
+    path: str
+    started_at: float
+    session: Session
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.session.duration * 1000, 3),
+        }
+
+
+class ProfileStore:
+    """The latest ``keep_per_route`` profiles of each route template."""
+
+    def __init__(self, keep_per_route: int = 5):
+        self.keep_per_route = keep_per_route
+        self._ids = itertools.count(1)
+        self._routes: dict[str, deque[RequestProfile]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route, method, path, started_at, session) -> RequestProfile:
+        with self._lock:
+            profile = RequestProfile(
+                next(self._ids), route, method, path, started_at, session
+            )
+            self._routes.setdefault(route, deque(maxlen=self.keep_per_route)).append(
+                profile
+            )
+        return profile
+
+    def by_route(self) -> dict[str, list[dict]]:
+        with self._lock:
+            return {
+                route: [profile.summary() for profile in reversed(profiles)]
+                for route, profiles in self._routes.items()
+            }
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        with self._lock:
+            for profiles in self._routes.values():
+                for profile in profiles:
+                    if profile.id == profile_id:
+                        return profile
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+class ProfileWriter:
+    """Renders profiles to files on a background thread, off the request path."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._queue: queue.Queue[RequestProfile] = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, profile: RequestProfile) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="profile-writer", daemon=True
+            )
+            self._thread.start()
+        self._queue.put(profile)
+
+    def join(self) -> None:
+        """Wait until every submitted profile is written."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            profile = self._queue.get()
+            try:
+                self._write(profile)
+            except Exception:
+                logger.exception(f"Could not write profile {profile.id}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, profile: RequestProfile) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"profile-{profile.id}")
+        with open(f"{base}.html", "w") as file:
+            file.write(HTMLRenderer().render(profile.session))
+        with open(f"{base}.speedscope.json", "w") as file:
+            file.write(SpeedscopeRenderer().render(profile.session))
+
+
+profiles = ProfileStore(keep_per_route=settings.profiling_keep_per_route)
+profile_writer = (
+    ProfileWriter(settings.profiling_output_dir)
+    if settings.profiling_output_dir
+    else None
+)
+
+
 class ProfileEndpointsMiddleWare(BaseHTTPMiddleware):
+    """Profiles requests that ask for it with the X-Profile header, and one in
+    every ``profiling_sample_every`` others when that is set. X-Profile is
+    only honored along with the internal API token.
+
+    Profiles are kept in ``profiles`` by route template and, when
+    ``profiling_output_dir`` is set, written there by ``profile_writer``.
+    """
+
+    def __init__(self, app, sample_every: int | None = None):
+        super().__init__(app)
+        if sample_every is None:
+            sample_every = settings.profiling_sample_every
+        self.sample_every = sample_every
+        self._requests = itertools.count()
+
+    def should_profile(self, request: Request) -> bool:
+        asked = request.headers.get(PROFILE_HEADER, "").lower() in ("1", "true")
+        if asked and is_internal_caller(request):
+            return True
+        return self.sample_every > 0 and next(self._requests) % self.sample_every == 0
+
     async def dispatch(self, request: Request, call_next):
-        if not profiler.is_running:
-            profiler.start()
-        response = await call_next(request)
-        if profiler.is_running:
-            profiler.stop()
-            with open(os.getcwd() + "/profiler2.json", "w") as file:
-                file.write(profiler.output(SpeedscopeRenderer()))
-            profiler.write_html(os.getcwd() + "/profiler.html")
-            profiler.start()
+        if not self.should_profile(request):
+            return await call_next(request)
+        request_profiler = Profiler(
+            interval=settings.profiling_interval_seconds, async_mode="enabled"
+        )
+        started_at = time.time()
+        request_profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            session = request_profiler.stop()
+        route = request.scope.get("route")
+        profile = profiles.add(
+            getattr(route, "path", request.url.path),
+            request.method,
+            request.url.path,
+            started_at,
+            session,
+        )
+        if profile_writer is not None:
+            profile_writer.submit(profile)
         return response
+
+
+class FlameGraphFormat(str, Enum):
+    collapsed = "collapsed"
+    speedscope = "speedscope"
+
+
+# Frames walked from a sampled stack back to its request before giving up.
+MAX_STACK_DEPTH = 256
+
+
+class StackSampler:
+    """Counts where requests spend their time, by route, over a rolling window.
+
+    A background thread reads every thread's stack ``rate`` times a second and
+    counts those running a request that entered ContinuousProfilerMiddleware
+    under the request's method and route template. Nothing runs inside the
+    requests themselves, unlike pyinstrument, whose hook fires on every call
+    whatever its interval. Stacks are counted in ten slices of the window and
+    the oldest slice is dropped as the window moves on.
+    """
+
+    SLICES = 10
+
+    def __init__(self, rate: float, window_seconds: float):
+        self.rate = rate
+        self.window_seconds = window_seconds
+        self.samples = 0
+        # Frame of each request's middleware call -> the request's scope.
+        self.requests: dict = {}
+        self._slice_seconds = window_seconds / self.SLICES
+        self._slices: deque[tuple[int, dict[str, Counter]]] = deque()
+        self._frames: dict = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(1 / self.rate):
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Could not sample stacks")
+
+    def sample(self) -> None:
+        """Count the current stack of every thread that is running a request."""
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                scope = self.requests.get(frame)
+                if scope is not None:
+                    stack.reverse()
+                    self.record(route_label(scope), tuple(stack))
+                    break
+                stack.append(self._frame(frame.f_code))
+                frame = frame.f_back
+
+    def _frame(self, code) -> tuple[str, str, int]:
+        frame = self._frames.get(code)
+        if frame is None:
+            frame = self._frames[code] = (
+                code.co_qualname,
+                code.co_filename,
+                code.co_firstlineno,
+            )
+        return frame
+
+    def record(self, route: str, stack: tuple, count: int = 1) -> None:
+        """Count ``stack``, outermost frame first, against ``route``."""
+        index = int(time.monotonic() // self._slice_seconds)
+        with self._lock:
+            if not self._slices or self._slices[-1][0] != index:
+                self._slices.append((index, {}))
+                self._expire(index)
+            self._slices[-1][1].setdefault(route, Counter())[stack] += count
+            self.samples += count
+
+    def _expire(self, index: int) -> None:
+        while self._slices and self._slices[0][0] <= index - self.SLICES:
+            self._slices.popleft()
+
+    def stacks(self, route: str | None = None) -> dict[str, Counter]:
+        """Stack counts within the window, by route; just ``route``'s if given."""
+        merged: dict[str, Counter] = {}
+        with self._lock:
+            self._expire(int(time.monotonic() // self._slice_seconds))
+            for _, routes in self._slices:
+                for name, counts in routes.items():
+                    if route is None or name == route:
+                        merged.setdefault(name, Counter()).update(counts)
+        return merged
+
+    def routes(self) -> dict[str, int]:
+        """Samples within the window per route, busiest first."""
+        totals = {
+            route: sum(counts.values()) for route, counts in self.stacks().items()
+        }
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slices.clear()
+            self.samples = 0
+
+    def render(self, format: FlameGraphFormat, route: str | None = None) -> str:
+        stacks = self.stacks(route)
+        if format == FlameGraphFormat.speedscope:
+            return self._speedscope(stacks)
+        return self._collapsed(stacks)
+
+    @staticmethod
+    def _collapsed(stacks: dict[str, Counter]) -> str:
+        """One ``route;outer;...;inner count`` line per distinct stack, the
+        input flamegraph.pl and most flame graph tools take."""
+        lines = [
+            ";".join(
+                [route, *(f"{name} ({file}:{line})" for name, file, line in stack)]
+            )
+            + f" {count}"
+            for route, counts in sorted(stacks.items())
+            for stack, count in sorted(counts.items())
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _speedscope(self, stacks: dict[str, Counter]) -> str:
+        """A speedscope file with one sampled profile per route, weighted in
+        seconds at the sampling rate."""
+        frames: dict[tuple, int] = {}
+        profiles = []
+        for route, counts in sorted(stacks.items()):
+            samples, weights = [], []
+            for stack, count in counts.items():
+                samples.append(
+                    [frames.setdefault(frame, len(frames)) for frame in stack]
+                )
+                weights.append(count / self.rate)
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": route,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            )
+        return json.dumps(
+            {
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": f"Last {self.window_seconds:g} seconds",
+                "exporter": "movie-api",
+                "activeProfileIndex": 0,
+                "shared": {
+                    "frames": [
+                        {"name": name, "file": file, "line": line}
+                        for name, file, line in frames
+                    ]
+                },
+                "profiles": profiles,
+            }
+        )
+
+
+def route_label(scope: Scope) -> str:
+    """``GET /v1/movies/{movie_id}``, or the raw path before routing."""
+    route = scope.get("route")
+    return f"{scope.get('method', 'WS')} {getattr(route, 'path', scope['path'])}"
+
+
+stack_sampler = (
+    StackSampler(
+        rate=settings.continuous_profiling_hz,
+        window_seconds=settings.continuous_profiling_window_seconds,
+    )
+    if settings.continuous_profiling_hz > 0
+    else None
+)
+
+
+class ContinuousProfilerMiddleware:
+    """Marks the requests that ``sampler`` attributes its samples to.
+
+    A sample is only attributed when the request's frames lead back to this
+    middleware, so it must sit inside any middleware that runs the rest of
+    the request in another task, like BaseHTTPMiddleware does.
+    """
+
+    def __init__(self, app: ASGIApp, sampler: StackSampler):
+        self.app = app
+        self.sampler = sampler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        frame = sys._getframe()
+        self.sampler.requests[frame] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            del self.sampler.requests[frame]
@@ -1,21 +1,67 @@
+import csv
+import io
+import json
 from typing import Annotated, List
 
 from babel.numbers import get_currency_name
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
 from app.api.internationalization import resolve_accept_language
 from app.api.rate_limit import limiter
-from app.core.exceptions import MovieNotFoundException
+from app.core.config import settings
+from app.core.exceptions import InvalidFieldsException, MovieNotFoundException
 from app.core.logger import background_task
-from app.db.database import get_db
-from app.models.movie import CreateMovie, Movie, MovieSchema
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.versions import etag_matches
+from app.db.database import (
+    client_key,
+    get_db,
+    get_read_db,
+    read_from_replica,
+    read_router,
+)
+from app.models.movie import (
+    BulkConflictAction,
+    BulkMovieResult,
+    CreateMovie,
+    ExportFormat,
+    Movie,
+    MovieFacets,
+    MoviePage,
+    MovieSchema,
+    MovieSort,
+)
 from app.security.security import get_current_user
-from app.services.movies_services import MovieService
+from app.services.movies_services import MovieService, movie_key
 
 router = APIRouter()
 
+MOVIE_FIELDS = list(MovieSchema.model_fields)
+
+
+def etags_enabled() -> bool:
+    """Whether the version counters see every worker's writes.
+
+    Counters of this process alone miss the writes of other workers, and
+    their ETags would earn 304s for movies those workers have changed.
+    """
+    return MovieService.versions.shared or settings.web_concurrency <= 1
+
+
+def etag_headers(etag: str | None, db: AsyncSession) -> dict[str, str]:
+    """The ETag header of a body read through ``db``, if it has one.
+
+    Versions follow the primary. A replica's rows may trail them, and
+    labelling those with the current ETag would have clients revalidate a
+    stale body for as long as the movie is left unchanged.
+    """
+    if etag is None or read_from_replica(db):
+        return {}
+    return {"ETag": etag}
+
 
 @router.post(
     "/",
@@ -44,27 +90,247 @@ async def create_movie(
         :param movie_data:
         :param db:
     """
-    movie = Movie(**movie_data.model_dump())
-    response = await MovieService.create_movie(movie, db)
+    response = await MovieService.create_movie(movie_data, db)
     return response
 
 
+@router.post(
+    "/bulk",
+    response_model=List[BulkMovieResult],
+    summary="Add or update movies in bulk (v1)",
+    description="Upsert a list of movies by title in batched multi-row inserts.",
+)
+async def bulk_upsert_movies(
+    movies_data: List[CreateMovie],
+    on_conflict: BulkConflictAction = BulkConflictAction.update,
+    db: AsyncSession = Depends(get_db),
+    _user=Depends(get_current_user),
+):
+    """
+    Insert a list of movies, updating or skipping titles that already exist.
+
+    Args:
+        movies_data (List[CreateMovie]): The movies to be written.
+        on_conflict (BulkConflictAction): ``update`` existing titles or ``skip`` them.
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[BulkMovieResult]: The created/updated/skipped status of each item,
+        in request order.
+    """
+    return await MovieService.bulk_upsert_movies(movies_data, db, on_conflict)
+
+
+def movie_fields(
+    fields: str | None = Query(
+        None, description="Comma-separated movie fields to return, e.g. id,title."
+    ),
+) -> list[str] | None:
+    """Parse a sparse fieldset; None means every field."""
+    if fields is None:
+        return None
+    requested = list(
+        dict.fromkeys(field.strip() for field in fields.split(",") if field.strip())
+    )
+    unknown = [field for field in requested if field not in MovieSchema.model_fields]
+    if unknown or not requested:
+        raise InvalidFieldsException(unknown)
+    return requested
+
+
 @router.get(
     "/",
-    response_model=List[MovieSchema],
+    response_model=MoviePage,
     summary="Get all movies (v1)",
-    description="Retrieve a list of all movie s in the version 1 database.",
+    description="Retrieve a page of movies in the version 1 database.",
+    responses={
+        304: {"description": "The catalog has not changed"},
+        400: {"description": "Invalid pagination cursor or fields"},
+    },
 )
 async def get_movies(
-    db: AsyncSession = Depends(get_db), _user=Depends(get_current_user)
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    sort: MovieSort = MovieSort.id,
+    genre: str | None = None,
+    director: str | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    fields: list[str] | None = Depends(movie_fields),
+    db: AsyncSession = Depends(get_read_db),
+    _user=Depends(get_current_user),
 ):
     """
-    Retrieve a list of all movies in the version 1 database.
+    Retrieve a page of movies in the version 1 database.
+
+    Args:
+        limit (int): Maximum number of movies in the page.
+        cursor (str): The ``next_cursor`` of the previous page, if any.
+        sort (MovieSort): Sort key; prefix with ``-`` for descending order.
+        genre (str): Only movies of this genre, matched case-insensitively.
+        director (str): Only movies by this director.
+        year_from (int): Only movies released in or after this year.
+        year_to (int): Only movies released in or before this year.
+        fields (List[str]): Only return these fields of each movie.
 
     Returns:
-        List[Movie]: A list of all movie objects in the database.
+        MoviePage: The movies in the page and the cursor of the next page, or
+        an empty 304 response if the If-None-Match ETag is still current.
     """
-    return await MovieService.get_all_movies(db)
+    etag = None
+    if etags_enabled():
+        etag = await MovieService.versions.etag()
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    if fields is None and settings.fast_movie_responses:
+        # Rows straight from the column select are already in MovieSchema's
+        # shape; rendering them once skips per-row validation and re-encoding.
+        fields = MOVIE_FIELDS
+    movies, next_cursor = await MovieService.get_movies_page(
+        db,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        genre=genre,
+        director=director,
+        year_from=year_from,
+        year_to=year_to,
+        fields=fields,
+    )
+    page = {"items": movies, "next_cursor": next_cursor}
+    if fields is not None:
+        # Pre-rendered, so the response_model is not applied.
+        return ORJSONResponse(page, headers=etag_headers(etag, db))
+    response.headers.update(etag_headers(etag, db))
+    return page
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _render_chunk(movies: List[Movie], export_format: ExportFormat) -> str:
+    rows = ([getattr(movie, field) for field in MOVIE_FIELDS] for movie in movies)
+    if export_format is ExportFormat.csv:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(MOVIE_FIELDS, row)), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+async def _export_movies(export_format: ExportFormat, client: str | None):
+    # The request-scoped session from get_read_db is closed before a streaming
+    # body is sent, so the export owns its session for the lifetime of the stream.
+    async with await read_router.open_session(client) as session:
+        if export_format is ExportFormat.csv:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(MOVIE_FIELDS)
+            yield buffer.getvalue()
+        async for movies in MovieService.stream_movies(session):
+            yield _render_chunk(movies, export_format)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export the movie catalog (v1)",
+    description="Stream every movie as NDJSON or CSV.",
+)
+async def export_movies(
+    request: Request,
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    _user=Depends(get_current_user),
+):
+    """
+    Stream the whole movie catalog in version 1.
+
+    Args:
+        export_format (ExportFormat): ``ndjson`` (default) or ``csv``.
+
+    Returns:
+        StreamingResponse: The catalog, written in fixed-size chunks of rows.
+    """
+    return StreamingResponse(
+        _export_movies(export_format, client_key(request)),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="movies.{export_format.value}"'
+        },
+    )
+
+
+@router.get(
+    "/search",
+    response_model=MoviePage,
+    summary="Search movies (v1)",
+    description="Full-text search over movie titles and directors, or "
+    "typo-tolerant title search with fuzzy=true.",
+    responses={400: {"description": "Invalid pagination cursor"}},
+)
+async def search_movies(
+    q: str = Query(..., min_length=1),
+    fuzzy: bool = False,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    _user=Depends(get_current_user),
+):
+    """
+    Search movies by title and director in version 1.
+
+    Args:
+        q (str): The words to search for.
+        fuzzy (bool): Match titles by trigram similarity, tolerating typos.
+        limit (int): Maximum number of movies in the page.
+        cursor (str): The ``next_cursor`` of the previous page, if any.
+
+    Returns:
+        MoviePage: The best-ranked matches and the cursor of the next page.
+    """
+    search = MovieService.fuzzy_search_movies if fuzzy else MovieService.search_movies
+    movies, next_cursor = await search(q, db, limit=limit, cursor=cursor)
+    return {"items": movies, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/facets",
+    response_model=MovieFacets,
+    summary="Get movie facet counts (v1)",
+    description="Count movies by genre, by release decade and for the top directors.",
+    responses={304: {"description": "The catalog has not changed"}},
+)
+async def get_movie_facets(
+    request: Request,
+    response: Response,
+    top_directors: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    _user=Depends(get_current_user),
+):
+    """
+    Count movies by genre, by release decade and for the top directors.
+
+    Args:
+        top_directors (int): How many of the directors with the most movies to list.
+
+    Returns:
+        MovieFacets: Genres by count, decades in order and the top directors, or
+        an empty 304 response if the If-None-Match ETag is still current.
+    """
+    etag = None
+    if etags_enabled():
+        etag = await MovieService.versions.etag()
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    facets = await MovieService.get_facets(db, top_directors=top_directors)
+    response.headers.update(etag_headers(etag, db))
+    return facets
 
 
 @router.get(
@@ -72,19 +338,30 @@ async def get_movies(
     response_model=MovieSchema,
     summary="Get a movie by ID (v1)",
     description="Retrieve details of a specific movie by its ID in version 1.",
-    responses={404: {"description": "Movie not found"}},
+    responses={
+        304: {"description": "The movie has not changed"},
+        400: {"description": "Invalid fields"},
+        404: {"description": "Movie not found"},
+    },
 )
 async def get_movie(
-    movie_id: int, db: AsyncSession = Depends(get_db), _user=Depends(get_current_user)
+    movie_id: int,
+    request: Request,
+    response: Response,
+    fields: list[str] | None = Depends(movie_fields),
+    db: AsyncSession = Depends(get_read_db),
+    _user=Depends(get_current_user),
 ):
     """
     Retrieve details of a specific movie by its ID in version 1.
 
     Args:
         movie_id (int): The unique ID of the movie to be retrieved.
+        fields (List[str]): Only return these fields of the movie.
 
     Returns:
-        Movie: The movie object if found.
+        Movie: The movie object if found, or an empty 304 response if the
+        If-None-Match ETag is still current.
 
     Raises:
         HTTPException: If the movie with the specified ID is not found, raises a 404 error.
@@ -92,9 +369,24 @@ async def get_movie(
         :param movie_id:
         :param db:
     """
-    movie = await MovieService.get_movie_by_id(movie_id, db)
+    etag, not_modified = None, False
+    if etags_enabled():
+        # Read the version before the row: a write in between yields a stale
+        # ETag, which only costs the client one extra full response.
+        version = await MovieService.versions.get(movie_key(movie_id))
+        etag = MovieService.versions.tag(version)
+        not_modified = etag_matches(request.headers.get("if-none-match"), etag)
+        # Version 0 only means no write this epoch, not that the movie exists.
+        if not_modified and version:
+            return Response(status_code=304, headers={"ETag": etag})
+    movie = await MovieService.get_movie_by_id(movie_id, db, fields=fields)
     if movie is None:
         raise MovieNotFoundException(movie_id)
+    if not_modified:
+        return Response(status_code=304, headers={"ETag": etag})
+    if fields is not None:
+        return ORJSONResponse(movie, headers=etag_headers(etag, db))
+    response.headers.update(etag_headers(etag, db))
     return movie
 
 
@@ -103,16 +395,23 @@ async def get_movie(
     response_model=List[MovieSchema],
     summary="Get movies by genre (v1)",
     description="Retrieve a list of movies by genre in version 1.",
-    responses={404: {"description": "No movies found"}},
+    responses={
+        400: {"description": "Invalid fields"},
+        404: {"description": "No movies found"},
+    },
 )
 async def get_movies_by_genre(
-    genre: str, db: AsyncSession = Depends(get_db), _user=Depends(get_current_user)
+    genre: str,
+    fields: list[str] | None = Depends(movie_fields),
+    db: AsyncSession = Depends(get_read_db),
+    _user=Depends(get_current_user),
 ):
     """
     Retrieve a list of movies by genre in version 1.
 
     Args:
         genre (str): The genre of movies to be retrieved.
+        fields (List[str]): Only return these fields of each movie.
 
     Returns:
         List[Movie]: A list of movie objects with the specified genre.
@@ -123,11 +422,13 @@ async def get_movies_by_genre(
         :param genre:
         :param db:
     """
-    movies = await MovieService.get_movies_by_genre(genre, db)
+    movies = await MovieService.get_movies_by_genre(genre, db, fields=fields)
     if not movies:
         raise HTTPException(
             status_code=404, detail=f"No movies found with genre '{genre}'"
         )
+    if fields is not None:
+        return ORJSONResponse(movies)
     return movies
 
 
@@ -167,8 +468,7 @@ async def update_movie(
             status_code=400, detail="Invalid input: movie_data is required"
         )
 
-    updated_movie = Movie(**movie_data.model_dump())
-    movie = await MovieService.update_movie(movie_id, updated_movie, db)
+    movie = await MovieService.update_movie(movie_id, movie_data, db)
     if movie is None:
         raise MovieNotFoundException(movie_id)
     return movie
@@ -0,0 +1,94 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class GroupCommitStats:
+    items: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+
+
+class GroupCommit(Generic[T, R]):
+    """Collects items submitted within ``window`` seconds, or until
+    ``max_items`` are waiting, and writes them with one ``flush`` call.
+
+    ``flush`` gets the items in submission order and returns one result per
+    item; a result that is an exception is raised to that item's caller
+    only, while an exception raised by ``flush`` itself fails the whole
+    batch. A caller that gives up waiting does not take its item back out of
+    a batch that is already being written.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[list[R | Exception]]],
+        window: float,
+        max_items: int,
+    ):
+        self.flush = flush
+        self.window = window
+        self.max_items = max_items
+        self.stats = GroupCommitStats()
+        self._pending: list[tuple[T, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self.stats.items += 1
+        if len(self._pending) >= self.max_items:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+        return await future
+
+    async def drain(self) -> None:
+        """Write whatever is waiting and wait for every batch in progress."""
+        if self._pending:
+            self._start_flush()
+        while self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        self.stats.batches += 1
+        try:
+            results = await self.flush([item for item, _ in batch])
+        except BaseException as exc:
+            self.stats.failed_batches += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+                    # Marks the exception retrieved for callers that left.
+                    future.exception()
+            if not isinstance(exc, Exception):
+                raise
+            return
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                future.exception()
+            else:
+                future.set_result(result)
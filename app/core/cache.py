@@ -0,0 +1,171 @@
+import functools
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from app.core.config import settings
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class CacheBackend(ABC):
+    """Key/value store for JSON-serializable values with a per-entry TTL."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+
+class LRUCache(CacheBackend):
+    """In-process cache bounded by entry count and age."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 60.0):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+
+class SharedCacheClient(Protocol):
+    """The subset of the redis.asyncio client API used by SharedCache."""
+
+    async def get(self, key: str) -> str | bytes | None: ...
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> Any: ...
+
+    async def delete(self, *keys: str) -> Any: ...
+
+
+class SharedCache(CacheBackend):
+    """Cache stored in a server shared by all workers, e.g. Redis.
+
+    Evictions happen on the server and are not counted here.
+    """
+
+    def __init__(
+        self,
+        client: SharedCacheClient,
+        ttl_seconds: float = 60.0,
+        prefix: str = "movie-api:",
+    ):
+        super().__init__()
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(
+            self.prefix + key, json.dumps(value), ex=math.ceil(self.ttl_seconds)
+        )
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+            self.stats.invalidations += len(keys)
+
+
+class LocalSharedClient:
+    """In-process stand-in for a shared cache server, for tests and local runs."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, float | None]] = {}
+
+    async def get(self, key: str) -> str | None:
+        value, expires_at = self._data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        expires_at = time.monotonic() + ex if ex is not None else None
+        self._data[key] = (value, expires_at)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        _, expires_at = self._data.get(key, (None, None))
+        self._data[key] = (str(value), expires_at)
+        return value
+
+
+@functools.cache
+def shared_client() -> SharedCacheClient:
+    """Client of the ``redis_url`` server, made once per process."""
+    # Imported here so that the redis package is only needed with redis_url.
+    import redis.asyncio
+
+    return redis.asyncio.from_url(settings.redis_url, decode_responses=True)
+
+
+def build_movie_cache() -> CacheBackend | None:
+    if not settings.movie_cache_enabled:
+        return None
+    if settings.redis_url:
+        return SharedCache(
+            shared_client(), ttl_seconds=settings.movie_cache_ttl_seconds
+        )
+    return LRUCache(
+        max_entries=settings.movie_cache_max_entries,
+        ttl_seconds=settings.movie_cache_ttl_seconds,
+    )
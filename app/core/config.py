@@ -8,7 +8,68 @@ class Settings(BaseSettings):
     environment: str
     debug: bool
     database_url: str
+    database_replica_urls: list[str] = []
+    read_your_writes_seconds: float = 5.0
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = False
+    db_pool_recycle: int = -1
+    db_echo: bool = False
+    db_statement_cache_size: int = 100
+    db_prepared_statement_cache_size: int = 100
+    # Count and time each request's SQL; reported in Server-Timing and logs.
+    sql_instrumentation: bool = True
     enable_profiling: bool
+    # Sent as X-Internal-Token to reach /internal/* and to profile requests on
+    # demand with X-Profile; both are refused while it is empty.
+    internal_api_token: str = ""
+    # Besides requests sent with X-Profile: 1, profile one in every N; 0 for none.
+    profiling_sample_every: int = 0
+    profiling_interval_seconds: float = 0.001
+    profiling_keep_per_route: int = 5
+    # Also write each profile there as HTML and speedscope JSON when set.
+    profiling_output_dir: str = ""
+    # Sample every request's stack this many times a second; 0 turns it off.
+    continuous_profiling_hz: float = 0.0
+    continuous_profiling_window_seconds: float = 300.0
+    # Worker processes serving the app; uvicorn and gunicorn read the same
+    # WEB_CONCURRENCY variable for their default worker count.
+    web_concurrency: int = 1
+    # Redis server shared by all workers, e.g. redis://localhost:6379/0; needs
+    # the redis package. Empty keeps the movie cache and the ETag versions in
+    # each process.
+    redis_url: str = ""
+    movie_cache_enabled: bool = True
+    movie_cache_ttl_seconds: float = 60.0
+    movie_cache_max_entries: int = 10_000
+    # A genre name missing from the in-memory map reloads the genre table at
+    # most this often; names of genres yet to exist do not each cost a load.
+    genre_reload_interval_seconds: float = 5.0
+    fuzzy_similarity_threshold: float = 0.3
+    fuzzy_index_max_age_seconds: float = 300.0
+    fast_movie_responses: bool = False
+    movie_read_coalescing: bool = True
+    movie_write_batching: bool = False
+    movie_write_batch_window_ms: float = 5.0
+    movie_write_batch_size: int = 100
+    password_hash_workers: int = 2
+    password_hash_max_queued: int = 64
+    # Startup picks the highest bcrypt cost hashing within this budget, but
+    # never below bcrypt_min_rounds; 0 keeps passlib's default cost.
+    password_hash_budget_ms: float = 250.0
+    bcrypt_min_rounds: int = 12
+    principal_cache_enabled: bool = True
+    principal_cache_ttl_seconds: float = 60.0
+    principal_cache_max_entries: int = 10_000
+    # Build the current user from the access token's claims without a query;
+    # role changes then apply only to tokens issued afterwards.
+    auth_trust_token_claims: bool = False
+    idempotency_enabled: bool = True
+    # "memory" for a single worker, "database" to share keys between workers.
+    idempotency_store: str = "memory"
+    idempotency_ttl_seconds: float = 86_400.0
+    idempotency_max_entries: int = 10_000
 
     class Config:
         env_file = f".env.{os.getenv('ENVIRONMENT', 'development')}"  # Load the appropriate .env file
@@ -15,6 +15,20 @@ class MovieAlreadyExistsException(Exception):
         self.movie_title = movie_title
 
 
+class InvalidCursorException(Exception):
+    def __init__(self, cursor: str):
+        self.cursor = cursor
+
+
+class InvalidFieldsException(Exception):
+    def __init__(self, fields: list[str]):
+        self.fields = fields
+
+
+class PasswordHasherBusyException(Exception):
+    pass
+
+
 # Handler for Movie Not Found
 async def movie_not_found_handler(request: Request, exc: MovieNotFoundException):
     return JSONResponse(
@@ -32,6 +46,33 @@ async def movie_already_exists_handler(
     )
 
 
+# Handler for Invalid Pagination Cursor
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorException):
+    return JSONResponse(
+        status_code=400,
+        content={"detail": "Invalid or expired pagination cursor."},
+    )
+
+
+# Handler for Unknown Sparse Fieldset Fields
+async def invalid_fields_handler(request: Request, exc: InvalidFieldsException):
+    return JSONResponse(
+        status_code=400,
+        content={"detail": f"Unknown or missing fields: {', '.join(exc.fields)}."},
+    )
+
+
+# Handler for a full password hashing queue
+async def password_hasher_busy_handler(
+    request: Request, exc: PasswordHasherBusyException
+):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins in progress, try again shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Custom Exception Handler for HTTPException
 async def http_exception_handler(request: Request, exc: HTTPException):
     logger.error(f"HTTPException: {exc.detail} (status: {exc.status_code})")
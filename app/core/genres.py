@@ -0,0 +1,62 @@
+import time
+from typing import NamedTuple
+
+
+class GenreEntry(NamedTuple):
+    id: int
+    name: str
+    label: str
+
+
+def canonical_genre(name: str) -> str:
+    """The case-folded form genres are stored and looked up by."""
+    return name.strip().casefold()
+
+
+class GenreMap:
+    """In-memory two-way map between genre ids and names.
+
+    Genre rows are only ever inserted, never renamed or deleted, so a map
+    that is missing entries may need a reload but never holds a wrong one.
+    """
+
+    def __init__(self):
+        self._labels: dict[int, str] = {}
+        self._ids: dict[str, int] = {}
+        self._loaded_at = float("-inf")
+
+    def __len__(self):
+        return len(self._labels)
+
+    def label(self, genre_id: int | None) -> str | None:
+        """The display name of ``genre_id``, as first written."""
+        return self._labels.get(genre_id)
+
+    def id(self, name: str) -> int | None:
+        return self._ids.get(canonical_genre(name))
+
+    def has_ids(self, genre_ids) -> bool:
+        return all(
+            genre_id in self._labels for genre_id in genre_ids if genre_id is not None
+        )
+
+    def loaded_within(self, seconds: float) -> bool:
+        """Whether the whole genre table was loaded less than ``seconds`` ago."""
+        return time.monotonic() - self._loaded_at < seconds
+
+    def mark_loaded(self) -> None:
+        self._loaded_at = time.monotonic()
+
+    def add(self, genre_id: int, name: str, label: str) -> None:
+        self._labels[genre_id] = label
+        self._ids[name] = genre_id
+
+    def clear(self) -> None:
+        self._labels.clear()
+        self._ids.clear()
+        self._loaded_at = float("-inf")
+
+
+# Shared by the ORM model, which renders genre names, and MovieService, which
+# keeps it filled.
+genre_map = GenreMap()
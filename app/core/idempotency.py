@@ -0,0 +1,132 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.models.idempotency import IdempotencyRecord
+
+INSERT_IGNORE_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class IdempotencyStore(ABC):
+    """Responses to writes by idempotency key, each kept for ``ttl_seconds``.
+
+    The first response stored for a key wins; later ones are dropped.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    async def get(self, key: str) -> StoredResponse | None: ...
+
+    @abstractmethod
+    async def put(self, key: str, response: StoredResponse) -> None: ...
+
+
+class LocalIdempotencyStore(IdempotencyStore):
+    """Responses held by this process; retries reaching another worker run
+    the write again."""
+
+    def __init__(self, ttl_seconds: float = 86_400.0, max_entries: int = 10_000):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        expires_at, response = self._entries.get(key, (0.0, None))
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return response
+
+    async def put(self, key: str, response: StoredResponse) -> None:
+        if await self.get(key) is not None:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Responses kept in the idempotency_keys table, shared by all workers."""
+
+    def __init__(self, session_factory=async_session, ttl_seconds: float = 86_400.0):
+        super().__init__(ttl_seconds)
+        self.session_factory = session_factory
+
+    async def get(self, key: str) -> StoredResponse | None:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(
+                    IdempotencyRecord.fingerprint,
+                    IdempotencyRecord.status_code,
+                    IdempotencyRecord.headers,
+                    IdempotencyRecord.body,
+                ).where(
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.expires_at > time.time(),
+                )
+            )
+            row = result.first()
+        if row is None:
+            return None
+        return StoredResponse(
+            row.fingerprint,
+            row.status_code,
+            [tuple(header) for header in json.loads(row.headers)],
+            row.body,
+        )
+
+    async def put(self, key: str, response: StoredResponse) -> None:
+        now = time.time()
+        async with self.session_factory() as session:
+            dialect = session.get_bind().dialect.name
+            await session.execute(
+                delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= now)
+            )
+            values = {
+                "key": key,
+                "fingerprint": response.fingerprint,
+                "status_code": response.status_code,
+                "headers": json.dumps(response.headers),
+                "body": response.body,
+                "expires_at": now + self.ttl_seconds,
+            }
+            # A concurrent request from another worker may have stored first.
+            await session.execute(
+                INSERT_IGNORE_DIALECTS[dialect](IdempotencyRecord)
+                .values(values)
+                .on_conflict_do_nothing(index_elements=[IdempotencyRecord.key])
+            )
+            await session.commit()
+
+
+def build_idempotency_store() -> IdempotencyStore | None:
+    if not settings.idempotency_enabled:
+        return None
+    if settings.idempotency_store == "database":
+        return DatabaseIdempotencyStore(ttl_seconds=settings.idempotency_ttl_seconds)
+    return LocalIdempotencyStore(
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        max_entries=settings.idempotency_max_entries,
+    )
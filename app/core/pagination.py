@@ -0,0 +1,43 @@
+import base64
+import binascii
+import json
+
+from app.core.exceptions import InvalidCursorException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    """Pack the sort key and the keyset position of the last row into an opaque token."""
+    payload = json.dumps({"s": sort, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, types: tuple | None = None) -> list:
+    """Return the keyset position stored in ``cursor``.
+
+    Raises InvalidCursorException if the token is malformed, was issued for a
+    different sort order than the one requested or, with ``types``, does not
+    hold one value of each of those types (a type or a tuple of types each).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        issued_for = payload["s"]
+    except (binascii.Error, ValueError, UnicodeDecodeError, KeyError, TypeError):
+        raise InvalidCursorException(cursor)
+    if issued_for != sort or not isinstance(values, list):
+        raise InvalidCursorException(cursor)
+    if types is not None and (
+        len(values) != len(types)
+        or not all(_is_instance(value, type_) for value, type_ in zip(values, types))
+    ):
+        raise InvalidCursorException(cursor)
+    return values
+
+
+def _is_instance(value, types) -> bool:
+    # bool is a subclass of int, but never a keyset value.
+    return isinstance(value, types) and not isinstance(value, bool)
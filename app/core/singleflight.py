@@ -0,0 +1,71 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    coalesced: int = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers with the
+    same key wait for it and share its result or exception.
+
+    Keys are tuples whose first item names what is read, so that ``forget``
+    can drop every variant of it. Shared results must not be mutated by the
+    callers.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.stats = SingleFlightStats()
+
+    def __len__(self):
+        return len(self._calls)
+
+    def forget(self, *names: Hashable) -> None:
+        """Let later callers start a fresh call for ``names`` instead of
+        joining one that may have read data older than a just-committed write.
+        """
+        for key in [key for key in self._calls if key[0] in names]:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._lead(key, call)
+            self.stats.coalesced += 1
+            try:
+                # Shielded so that one waiter giving up does not cancel the
+                # call for the others.
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The caller running the call was cancelled; take over.
+
+    async def _lead(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats.calls += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Marks the exception retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
@@ -0,0 +1,137 @@
+import math
+import re
+import time
+from collections import Counter, defaultdict
+
+WORD = re.compile(r"[^\W_]+")
+EMPTY = frozenset()
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of ``text`` as pg_trgm builds them: per lower-cased word, padded
+    with two leading blanks and one trailing blank."""
+    grams = set()
+    for word in WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(left: set[str], right: set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+class TrigramIndex:
+    """In-process inverted index from trigram to title ids.
+
+    A title with similarity >= threshold shares at least ``ceil(t * n)`` of
+    the query's ``n`` trigrams, so it may miss some of the longest posting
+    lists entirely. Lookups count overlaps over the shorter lists only, drop
+    candidates that cannot reach the threshold, and probe the skipped long
+    lists just for the survivors.
+    """
+
+    SKIP_RATIO = 4
+
+    def __init__(self):
+        self._titles: dict[int, str] = {}
+        self._sizes: dict[int, int] = {}
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self.built_at: float | None = None
+
+    def __len__(self):
+        return len(self._titles)
+
+    def is_stale(self, max_age_seconds: float) -> bool:
+        return self.built_at is None or (
+            time.monotonic() - self.built_at > max_age_seconds
+        )
+
+    @classmethod
+    def build(cls, titles) -> "TrigramIndex":
+        """A new index of ``titles``, an iterable of (id, title)."""
+        index = cls()
+        index.rebuild(titles)
+        return index
+
+    def rebuild(self, titles) -> None:
+        """Replace the whole index with ``titles``, an iterable of (id, title)."""
+        self._titles.clear()
+        self._sizes.clear()
+        self._postings.clear()
+        for movie_id, title in titles:
+            self.add(movie_id, title)
+        self.built_at = time.monotonic()
+
+    def add(self, movie_id: int, title: str) -> None:
+        self.remove(movie_id)
+        grams = trigrams(title)
+        self._titles[movie_id] = title
+        self._sizes[movie_id] = len(grams)
+        for gram in grams:
+            self._postings[gram].add(movie_id)
+
+    def remove(self, movie_id: int) -> None:
+        title = self._titles.pop(movie_id, None)
+        if title is None:
+            return
+        del self._sizes[movie_id]
+        for gram in trigrams(title):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(movie_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query: str, threshold: float = 0.3) -> list[tuple[float, int]]:
+        """Return (similarity, id) of every title at or above ``threshold``,
+        best first, ties by id."""
+        wanted = trigrams(query)
+        if not wanted:
+            return []
+        size = len(wanted)
+        required = max(math.ceil(threshold * size), 1)
+        lists = sorted((self._postings.get(gram, EMPTY) for gram in wanted), key=len)
+
+        # A match shares at least ``required`` trigrams, so it still shows up
+        # in ``required - skip`` of the counted lists when the ``skip`` longest
+        # are left out. Skip a long list while counting it would cost more
+        # than SKIP_RATIO times all shorter lists together.
+        skip = 0
+        while skip < required - 1:
+            longest, rest = lists[size - 1 - skip], lists[: size - 1 - skip]
+            if len(longest) * self.SKIP_RATIO <= sum(map(len, rest)):
+                break
+            skip += 1
+        counted, skipped = lists[: size - skip], lists[size - skip :]
+
+        shared = Counter()
+        for posting in counted:
+            shared.update(posting)
+        if required - skip > 1:
+            shared = Counter(
+                {
+                    movie_id: overlap
+                    for movie_id, overlap in shared.items()
+                    if overlap >= required - skip
+                }
+            )
+        survivors = shared.keys()
+        for posting in skipped:
+            for movie_id in (
+                posting & survivors
+                if len(posting) > len(survivors)
+                else survivors & posting
+            ):
+                shared[movie_id] += 1
+
+        matches = []
+        for movie_id, overlap in shared.items():
+            score = overlap / (size + self._sizes[movie_id] - overlap)
+            if score >= threshold:
+                matches.append((score, movie_id))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches
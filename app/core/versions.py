@@ -0,0 +1,97 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Protocol
+
+from app.core.cache import shared_client
+from app.core.config import settings
+
+CATALOG_KEY = "catalog"
+
+
+class VersionStore(ABC):
+    """Monotonic write counters for the whole catalog and for single keys.
+
+    ``epoch`` is part of every ETag, so counters that restart from zero (e.g.
+    after a process restart) never reproduce an ETag handed out earlier.
+    """
+
+    epoch: str
+    # Whether every worker sees the same counters.
+    shared: bool
+
+    @abstractmethod
+    async def bump(self, *keys: str) -> None:
+        """Record a write to ``keys``; the catalog version is always bumped."""
+
+    @abstractmethod
+    async def get(self, key: str) -> int: ...
+
+    async def etag(self, key: str = CATALOG_KEY) -> str:
+        return self.tag(await self.get(key))
+
+    def tag(self, version: int) -> str:
+        return f'"{self.epoch}.{version}"'
+
+
+class LocalVersionStore(VersionStore):
+    """Counters held by this process; correct for a single worker only."""
+
+    shared = False
+
+    def __init__(self):
+        self.epoch = f"{time.time_ns():x}"
+        self._versions: dict[str, int] = {}
+
+    async def bump(self, *keys: str) -> None:
+        for key in {CATALOG_KEY, *keys}:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    async def get(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+
+class SharedCounterClient(Protocol):
+    """The subset of the redis.asyncio client API used by SharedVersionStore."""
+
+    async def get(self, key: str) -> str | bytes | None: ...
+
+    async def incr(self, key: str) -> Any: ...
+
+
+class SharedVersionStore(VersionStore):
+    """Counters kept on a server shared by all workers, e.g. Redis."""
+
+    shared = True
+
+    def __init__(
+        self,
+        client: SharedCounterClient,
+        epoch: str = "s",
+        prefix: str = "movie-api:version:",
+    ):
+        self.client = client
+        self.epoch = epoch
+        self.prefix = prefix
+
+    async def bump(self, *keys: str) -> None:
+        for key in {CATALOG_KEY, *keys}:
+            await self.client.incr(self.prefix + key)
+
+    async def get(self, key: str) -> int:
+        return int(await self.client.get(self.prefix + key) or 0)
+
+
+def build_version_store() -> VersionStore:
+    if settings.redis_url:
+        return SharedVersionStore(shared_client())
+    return LocalVersionStore()
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
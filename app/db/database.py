@@ -1,14 +1,28 @@
+import hashlib
+import itertools
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Depends, Request
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.core.logger import logger
+from app.db.migrations import stamp_if_unversioned
+from app.db.pool import engine_options
 
 DATABASE_URL = settings.database_url
 
 Base = declarative_base()
 
 # Create Async Engine for PostgreSQL
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 
 # Create a sessionmaker for async ORM
 async_session = sessionmaker(
@@ -19,13 +33,237 @@ async_session = sessionmaker(
 )
 
 
+class RoutedSession(Session):
+    """Session that binds to the first reachable of ``candidates``, (replica
+    index or None for the primary, session factory) pairs, once it first
+    needs a connection.
+
+    Requests answered without the database, from a cache or with a 304,
+    never check out a connection. The chosen replica's index is kept in
+    ``info["replica"]``.
+    """
+
+    def __init__(self, *args, router: "ReadRouter", candidates, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._router = router
+        self._candidates = candidates
+        self._routed_bind = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        while self._routed_bind is None:
+            index, factory = next(self._candidates)
+            engine = factory.kw["bind"].sync_engine
+            if index is not None:
+                try:
+                    # Returned to the pool at once; the session's own checkout
+                    # takes the same connection back.
+                    engine.connect().close()
+                except (DBAPIError, OSError) as exc:
+                    self._router.mark_down(index, exc)
+                    continue
+            self.info["replica"] = index
+            self._routed_bind = engine
+        return self._routed_bind
+
+
+def shares_reads(session: AsyncSession) -> bool:
+    """Whether rows read through ``session`` may be cached or handed to other
+    requests.
+
+    Not when they may come from a lagging replica, which would serve stale
+    rows to clients of the primary, nor for a client pinned to the primary
+    to read its own writes.
+    """
+    return session.info.get("shares_reads", True)
+
+
+def read_from_replica(session: AsyncSession) -> bool:
+    """Whether ``session`` has read from a replica, whose rows may trail the
+    primary's."""
+    return session.info.get("replica") is not None
+
+
+class ReadRouter:
+    """Chooses where a request's reads go.
+
+    Replicas take turns; the primary serves reads when there are no replicas,
+    when every replica is unreachable, and for clients that wrote within the
+    last ``pin_seconds`` so that they read their own writes despite replica
+    lag. Pins live in this process only: with several workers, a client's
+    next read may reach one that never saw its write and go to a replica.
+    """
+
+    def __init__(self, primary, replicas=(), pin_seconds: float = 5.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.pin_seconds = pin_seconds
+        self._turns = itertools.cycle(range(len(self.replicas)))
+        self._pinned_until: dict[str, float] = {}
+        self._down_until: dict[int, float] = {}
+
+    def pin(self, client: str | None) -> None:
+        if client is None:
+            return
+        now = time.monotonic()
+        if len(self._pinned_until) >= 10_000:
+            self._pinned_until = {
+                key: until for key, until in self._pinned_until.items() if until > now
+            }
+        self._pinned_until[client] = now + self.pin_seconds
+
+    def is_pinned(self, client: str | None) -> bool:
+        return self._pinned_until.get(client, 0.0) > time.monotonic()
+
+    def candidates(self, client: str | None):
+        """Session factories to try in order; the primary always comes last."""
+        if self.replicas and not self.is_pinned(client):
+            now = time.monotonic()
+            start = next(self._turns)
+            for offset in range(len(self.replicas)):
+                index = (start + offset) % len(self.replicas)
+                if self._down_until.get(index, 0.0) <= now:
+                    yield index, self.replicas[index]
+        yield None, self.primary
+
+    def mark_down(self, index: int, exc: Exception) -> None:
+        self._down_until[index] = time.monotonic() + 30.0
+        logger.warning(f"Read replica {index} unavailable: {exc}")
+
+    async def open_session(self, client: str | None) -> AsyncSession:
+        if not self.replicas:
+            return self.primary()
+        session = self.primary(
+            sync_session_class=RoutedSession,
+            router=self,
+            candidates=self.candidates(client),
+        )
+        session.info["shares_reads"] = False
+        return session
+
+
+replica_engines = [
+    create_async_engine(url, **engine_options(url))
+    for url in settings.database_replica_urls
+]
+replica_sessions = [
+    sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        class_=AsyncSession,
+    )
+    for replica_engine in replica_engines
+]
+read_router = ReadRouter(
+    async_session, replica_sessions, settings.read_your_writes_seconds
+)
+
+
+def client_key(request: Request) -> str | None:
+    """Who a request comes from, for read-your-writes pinning.
+
+    Credentials are hashed, so that the pins held in memory never hold a
+    usable token.
+    """
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else None
+
+
+@dataclass
+class QueryStats:
+    """Statements executed while tracking, with their total time."""
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    # Statements also count towards the tracking they are nested in.
+    parent: "QueryStats | None" = None
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        """Statements run more than once, the usual sign of an N+1 pattern."""
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count > 1
+        }
+
+    def record(self, statement: str, seconds: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries():
+    """Record the statements executed in this context, on any engine, once
+    instrument_queries() has run."""
+    stats = QueryStats(parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None and context is not None:
+        context.query_started_at = time.perf_counter()
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    started = getattr(context, "query_started_at", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_queries() -> None:
+    """Time every engine's statements for track_queries(). Until this runs,
+    executing a statement costs no context variable lookups."""
+    for name, listener in [
+        ("before_cursor_execute", _start_query_timer),
+        ("after_cursor_execute", _record_query),
+    ]:
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
 # Initialize database models
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # Tables create_all just built are at head; later upgrades start there.
+        await conn.run_sync(stamp_if_unversioned, Base.metadata)
 
 
 # Dependency to get the session
-async def get_db():
+async def get_db(request: Request):
     async with async_session() as session:
+        client = client_key(request)
+        # Committed writes send this client's reads to the primary for a while.
+        event.listen(
+            session.sync_session, "after_commit", lambda _: read_router.pin(client)
+        )
+        yield session
+
+
+# Dependency to get a session for reads, from a replica when one is configured
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_db)):
+    if not read_router.replicas:
+        # The request's primary session, which authentication already uses.
+        yield primary
+        return
+    session = await read_router.open_session(client_key(request))
+    async with session:
         yield session
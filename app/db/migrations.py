@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from sqlalchemy import MetaData
+from sqlalchemy.engine import Connection
+
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+SCRIPT_LOCATION = Path(__file__).resolve().parents[2] / "alembic"
+
+
+def stamp_if_unversioned(connection: Connection, metadata: MetaData) -> str | None:
+    """Record the head revision on a database that has every table and column
+    of ``metadata`` but no Alembic version, and return it.
+
+    create_all builds the head schema without recording a version, after
+    which ``alembic upgrade head`` would replay every revision against it.
+    Databases missing part of ``metadata`` are left for the migrations.
+    """
+    if not metadata.tables or not SCRIPT_LOCATION.is_dir():
+        return None
+    context = MigrationContext.configure(connection)
+    if context.get_current_revision() is not None:
+        return None
+    missing = [
+        diff
+        for diff in compare_metadata(context, metadata)
+        if isinstance(diff, tuple) and diff[0] in ("add_table", "add_column")
+    ]
+    if missing:
+        return None
+    scripts = ScriptDirectory(str(SCRIPT_LOCATION))
+    head = scripts.get_current_head()
+    context.stamp(scripts, head)
+    return head
@@ -0,0 +1,111 @@
+import bisect
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+# Upper bounds, in milliseconds, of the checkout wait-time histogram buckets.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    # One count per WAIT_BUCKETS_MS bound, plus one for longer waits.
+    wait_histogram: list[int] = field(
+        default_factory=lambda: [0] * (len(WAIT_BUCKETS_MS) + 1)
+    )
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """The default async queue pool, timing how long each checkout waits."""
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        # QueuePool exposes no accessor for it.
+        self.max_overflow = max_overflow
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+        self.stats.checkouts += 1
+        return connection
+
+
+def engine_options(url: str) -> dict:
+    """Keyword arguments for create_async_engine from the pool settings."""
+    options = {
+        "echo": settings.db_echo,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        # In-memory SQLite keeps its single-connection pool.
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    if parsed.get_driver_name() == "asyncpg":
+        # SQLAlchemy prepares every statement as a named server-side
+        # statement and keeps it per connection, keyed by SQL text.
+        options["connect_args"] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+        }
+    return options
+
+
+def pool_status(engine) -> dict:
+    """Occupancy and checkout statistics of ``engine``'s pool."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, InstrumentedQueuePool):
+        stats = pool.stats
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            # Negative while fewer than pool_size connections are open.
+            overflow=pool.overflow(),
+            max_overflow=pool.max_overflow,
+            timeout_seconds=pool.timeout(),
+            checkouts=stats.checkouts,
+            checkout_timeouts=stats.timeouts,
+            wait_seconds_total=stats.wait_seconds_total,
+            wait_seconds_max=stats.wait_seconds_max,
+            wait_histogram_ms={
+                **{
+                    f"le_{bound}": count
+                    for bound, count in zip(WAIT_BUCKETS_MS, stats.wait_histogram)
+                },
+                f"gt_{WAIT_BUCKETS_MS[-1]}": stats.wait_histogram[-1],
+            },
+        )
+    return status
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.fastapi import GraphQLRouter
 from strawberry.types import Info
 
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.services.movies_services import MovieService
 
 
@@ -19,7 +19,7 @@ class Movie:
     release_year: int
 
 
-async def get_context(db: AsyncSession = Depends(get_db)):
+async def get_context(db: AsyncSession = Depends(get_read_db)):
     return {"db": db}
 
 
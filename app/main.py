@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -12,26 +13,40 @@ from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
-from app.api.profiler import ProfileEndpointsMiddleWare
+from app.api import internal
+from app.api.profiler import (
+    ContinuousProfilerMiddleware,
+    ProfileEndpointsMiddleWare,
+    stack_sampler,
+)
 from app.api.rate_limit import limiter
 from app.api.v1 import movies, users
 from app.chat import chat_room, secure_chat_room, ws_security
 from app.core.config import settings
 from app.core.exceptions import (
+    InvalidCursorException,
+    InvalidFieldsException,
     MovieAlreadyExistsException,
     MovieNotFoundException,
+    PasswordHasherBusyException,
     http_exception_handler,
+    invalid_cursor_handler,
+    invalid_fields_handler,
     movie_already_exists_handler,
     movie_not_found_handler,
+    password_hasher_busy_handler,
     unhandled_exception_handler,
     validation_exception_handler,
 )
-from app.db.database import init_db
+from app.core.idempotency import build_idempotency_store
+from app.db.database import init_db, instrument_queries
 from app.gql.gql_utils import graphql_app
 from app.grpc import api as grpc
 from app.jobs.scheduler_jobs import scheduler
 from app.middleware.asgi_middleware import ASGIMiddleware, asgi_middleware
+from app.middleware.idempotency import IdempotencyMiddleware
 from app.middleware.middleware import ClientInfoMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 from app.middleware.req_middleware import HashBodyContentMiddleWare
 from app.middleware.res_middleware import ExtraHeadersResponseMiddleware
 from app.middleware.webhook import Event, WebhookSenderMiddleWare
@@ -39,6 +54,8 @@ from app.ml import doctor
 from app.ml.doctor import FILENAME, REPO_ID, ml_model
 from app.security import api as security
 from app.security import github_login, mfa
+from app.security.passwords import password_hasher
+from app.services.movies_services import MovieService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +68,14 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup...")
     scheduler.start()
     await init_db()  # Initialize the database and create tables
+    if settings.password_hash_budget_ms > 0:
+        await asyncio.to_thread(
+            password_hasher.calibrate,
+            settings.password_hash_budget_ms / 1000,
+            settings.bcrypt_min_rounds,
+        )
+    if stack_sampler is not None:
+        stack_sampler.start()
 
     # Download the file with SSL verification disabled
     url = hf_hub_url(repo_id=REPO_ID, filename=FILENAME)
@@ -65,7 +90,12 @@ async def lifespan(app: FastAPI):
     ml_model.clear()
     # Shutdown event
     logger.info("Application shutdown...")
+    if MovieService.writes is not None:
+        await MovieService.writes.drain()
     scheduler.shutdown()
+    password_hasher.shutdown()
+    if stack_sampler is not None:
+        stack_sampler.stop()
 
 
 app = FastAPI(
@@ -85,6 +115,23 @@ app = FastAPI(
     ],
 )
 
+# Added first so that it runs in the same task as the endpoints it samples.
+if stack_sampler is not None:
+    app.add_middleware(ContinuousProfilerMiddleware, sampler=stack_sampler)
+
+# Added before the middleware below, which therefore also wrap replayed responses.
+idempotency_store = build_idempotency_store()
+if idempotency_store is not None:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=idempotency_store,
+        routes=[
+            ("POST", "/v1/movies/"),
+            ("PUT", r"/v1/movies/\d+"),
+            ("DELETE", r"/v1/movies/\d+"),
+        ],
+    )
+
 app.add_middleware(
     HashBodyContentMiddleWare,
     allowed_paths=["/v1/doctor/send"],
@@ -121,6 +168,11 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 # Add middleware to log client information
 app.add_middleware(ClientInfoMiddleware)
 
+# Add middleware to count and time each request's SQL statements
+if settings.sql_instrumentation:
+    instrument_queries()
+    app.add_middleware(QueryStatsMiddleware)
+
 # Add middleware to profile endpoint
 if settings.enable_profiling:
     app.add_middleware(ProfileEndpointsMiddleWare)
@@ -139,10 +191,14 @@ app.include_router(ws_security.router, prefix="/v1/wss", tags=["WS Security [v1]
 app.include_router(grpc.router, prefix="/v1/grpc", tags=["gRPC [v1]"])
 app.include_router(graphql_app, prefix="/graphql")
 app.include_router(doctor.router, prefix="/v1/doctor", tags=["Doctor [v1]"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"])
 
 # Register global exception handlers
 app.add_exception_handler(MovieNotFoundException, movie_not_found_handler)
 app.add_exception_handler(MovieAlreadyExistsException, movie_already_exists_handler)
+app.add_exception_handler(InvalidCursorException, invalid_cursor_handler)
+app.add_exception_handler(InvalidFieldsException, invalid_fields_handler)
+app.add_exception_handler(PasswordHasherBusyException, password_hasher_busy_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(Exception, unhandled_exception_handler)
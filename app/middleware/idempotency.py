@@ -0,0 +1,135 @@
+import re
+from hashlib import sha256
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.idempotency import IdempotencyStore, StoredResponse
+from app.core.singleflight import SingleFlight
+from app.db.database import client_key
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+# Outcomes that depend on the caller's credentials or rate limit rather than
+# on the write; a retry must run again to get past them.
+UNSTORED_STATUSES = {401, 403, 429}
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response to a write retried with the same
+    Idempotency-Key instead of running it again.
+
+    Keys are scoped to the client (its Authorization header, else its
+    address). A key reused with a different method, path or body gets a 422.
+    Concurrent requests with one key in this process run the write once;
+    server errors are not stored, so a retry after one runs the write again.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        routes: list[tuple[str, str]],
+    ):
+        self.app = app
+        self.store = store
+        self.routes = [(method, re.compile(path)) for method, path in routes]
+        self.in_flight = SingleFlight()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope, receive)
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={
+                    "detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters."
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await request.body()
+        fingerprint = sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), body])
+        ).hexdigest()
+        key = sha256(f"{client_key(request)}\n{idempotency_key}".encode()).hexdigest()
+        executed = False
+
+        async def execute():
+            nonlocal executed
+            executed = True
+            stored = await self._execute(scope, fingerprint, body, receive, send)
+            if stored.status_code < 500 and stored.status_code not in UNSTORED_STATUSES:
+                await self.store.put(key, stored)
+            return stored
+
+        stored = await self.store.get(key)
+        if stored is None:
+            stored = await self.in_flight.do(("idempotency", key), execute)
+            if executed:
+                return
+
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                status_code=422,
+                content={
+                    "detail": "Idempotency-Key was already used for a different request."
+                },
+            )
+            await response(scope, receive, send)
+            return
+        response = Response(content=stored.body, status_code=stored.status_code)
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in stored.headers
+        ] + [
+            (b"content-length", str(len(stored.body)).encode()),
+            (b"idempotent-replayed", b"true"),
+        ]
+        await response(scope, receive, send)
+
+    async def _execute(
+        self, scope: Scope, fingerprint: str, body: bytes, receive: Receive, send: Send
+    ) -> StoredResponse:
+        """Run the request, sending its response and keeping a copy."""
+        body_sent = False
+        status_code = 500
+        headers = []
+        chunks = []
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_and_keep(message: Message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                    if name.lower() != b"content-length"
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive_body, send_and_keep)
+        return StoredResponse(fingerprint, status_code, headers, b"".join(chunks))
+
+    def _applies(self, scope: Scope) -> bool:
+        return any(
+            scope["method"] == method and path.fullmatch(scope["path"])
+            for method, path in self.routes
+        )
@@ -0,0 +1,43 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logger import logger
+from app.db.database import track_queries
+
+
+class QueryStatsMiddleware:
+    """Counts and times each request's SQL statements.
+
+    The statements run before the response starts are reported in a
+    ``Server-Timing: db`` entry; the full count, including any run while a
+    response streams, is logged once the request completes, with a warning
+    for statements that ran more than once.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        route = f"{scope['method']} {scope['path']}"
+        logger.info(f"{route}: {stats.count} queries in {stats.seconds * 1000:.1f} ms")
+        for statement, count in stats.duplicates.items():
+            logger.warning(
+                f"{route} ran the same statement {count} times: {statement[:200]}"
+            )
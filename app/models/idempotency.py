@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Float, Integer, LargeBinary, String, Text
+
+from app.db.database import Base
+
+
+class IdempotencyRecord(Base):
+    """The first response to a write sent with an Idempotency-Key."""
+
+    __tablename__ = "idempotency_keys"
+
+    # Hash of the client and the key it sent.
+    key = Column(String(64), primary_key=True)
+    # Hash of the method, path and body the key was first used with.
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    # JSON list of [name, value] pairs.
+    headers = Column(Text, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    # Unix time; expired rows are ignored and purged on later writes.
+    expires_at = Column(Float, nullable=False, index=True)
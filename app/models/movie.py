@@ -1,22 +1,152 @@
+from enum import Enum
+from typing import List
+
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import DDL, Column, ForeignKey, Index, Integer, String, event
 
+from app.core.genres import genre_map
 from app.db.database import Base
 
 
+class Genre(Base):
+    __tablename__ = "genres"
+
+    id = Column(Integer, primary_key=True)
+    # Case-folded; lookups by genre are case-insensitive.
+    name = Column(String, unique=True, nullable=False)
+    # The spelling the genre was first written with, returned by the API.
+    label = Column(String, nullable=False)
+
+    def __repr__(self):
+        return f"<Genre name={self.name}>"
+
+
 class Movie(Base):
     __tablename__ = "movies"
+    __table_args__ = (
+        # Keyset pagination orders by (sort key, id); these back the non-id sorts.
+        Index("ix_movies_title_id", "title", "id"),
+        Index("ix_movies_release_year_id", "release_year", "id"),
+        # Equality filters combined with a year range or the release year sort;
+        # they also serve genre_id and director on their own.
+        Index("ix_movies_genre_id_release_year", "genre_id", "release_year", "id"),
+        Index("ix_movies_director_release_year", "director", "release_year", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
-    genre = Column(String, index=True)
-    director = Column(String, index=True)
+    title = Column(String, index=True, unique=True)
+    genre_id = Column(Integer, ForeignKey("genres.id"))
+    director = Column(String)
     release_year = Column(Integer)
 
+    @property
+    def genre(self) -> str | None:
+        # Resolved through the in-memory genre map rather than a join.
+        if self.genre_id is None:
+            return getattr(self, "_genre_name", None)
+        return genre_map.label(self.genre_id)
+
+    @genre.setter
+    def genre(self, name: str | None):
+        # Genres not stored yet have no id; the name is kept for display only.
+        self.genre_id = None if name is None else genre_map.id(name)
+        self._genre_name = name
+
     def __repr__(self):
         return f"<Movie title={self.title}, director={self.director}, year={self.release_year}>"
 
 
+class MovieFacet(Base):
+    """Movie count per facet value, kept current by the MovieService writes."""
+
+    __tablename__ = "movie_facets"
+    __table_args__ = (Index("ix_movie_facets_facet_count", "facet", "count"),)
+
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# Full-text search over title and director. The structures differ per dialect
+# and stay out of the ORM mapping, so they are created alongside the table.
+POSTGRES_SEARCH_DDL = [
+    "ALTER TABLE movies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(director, ''))) "
+    "STORED",
+    "CREATE INDEX ix_movies_search_vector ON movies USING gin (search_vector)",
+]
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE movies_fts USING fts5("
+    "title, director, content='movies', content_rowid='id')",
+    "CREATE TRIGGER movies_fts_insert AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, title, director) "
+    "VALUES (new.id, new.title, new.director); END",
+    "CREATE TRIGGER movies_fts_delete AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, director) "
+    "VALUES ('delete', old.id, old.title, old.director); END",
+    "CREATE TRIGGER movies_fts_update AFTER UPDATE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, director) "
+    "VALUES ('delete', old.id, old.title, old.director); "
+    "INSERT INTO movies_fts(rowid, title, director) "
+    "VALUES (new.id, new.title, new.director); END",
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(
+        Movie.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        Movie.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+
+
+def _has_pg_trgm(ddl, target, bind, **kw) -> bool:
+    return (
+        bind.exec_driver_sql(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        ).first()
+        is not None
+    )
+
+
+# Backs fuzzy title search; without pg_trgm the app falls back to an
+# in-process trigram index.
+event.listen(
+    Movie.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_movies_title_trgm ON movies USING gin (title gin_trgm_ops)"
+    ).execute_if(dialect="postgresql", callable_=_has_pg_trgm),
+)
+# The triggers go with the table, but the FTS table would outlive it.
+event.listen(
+    Movie.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS movies_fts").execute_if(dialect="sqlite"),
+)
+
+
+class MovieSort(str, Enum):
+    id = "id"
+    id_desc = "-id"
+    title = "title"
+    title_desc = "-title"
+    release_year = "release_year"
+    release_year_desc = "-release_year"
+
+
+class FacetName(str, Enum):
+    genre = "genre"
+    decade = "decade"
+    director = "director"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 # Pydantic model for serialization/validation
 class MovieSchema(BaseModel):
     id: int
@@ -30,6 +160,39 @@ class MovieSchema(BaseModel):
     }
 
 
+class MoviePage(BaseModel):
+    items: List[MovieSchema]
+    next_cursor: str | None = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class MovieFacets(BaseModel):
+    genres: List[FacetCount]
+    decades: List[FacetCount]
+    directors: List[FacetCount]
+
+
+class BulkConflictAction(str, Enum):
+    update = "update"
+    skip = "skip"
+
+
+class BulkItemStatus(str, Enum):
+    created = "created"
+    updated = "updated"
+    skipped = "skipped"
+
+
+class BulkMovieResult(BaseModel):
+    title: str
+    status: BulkItemStatus
+    movie: MovieSchema | None = None
+
+
 class CreateMovie(BaseModel):
     title: str
     genre: str
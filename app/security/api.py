@@ -68,7 +68,11 @@ async def get_user_access_token(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
-    access_token = create_access_token({"sub": user.username}, [user.role])
+    # uid, email and role let auth_trust_token_claims skip the user lookup.
+    access_token = create_access_token(
+        {"sub": user.username, "uid": user.id, "email": user.email, "role": user.role},
+        [user.role],
+    )
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -1,5 +1,28 @@
 import secrets
 
+from fastapi import HTTPException, Request
+from starlette import status
+
+from app.core.config import settings
+
+INTERNAL_TOKEN_HEADER = "x-internal-token"
+
 
 def generate_api_key() -> str:
     return secrets.token_urlsafe(32)
+
+
+def is_internal_caller(request: Request) -> bool:
+    """Whether ``request`` carries the internal API token; never true while
+    no token is configured."""
+    token = settings.internal_api_token
+    supplied = request.headers.get(INTERNAL_TOKEN_HEADER, "")
+    return bool(token) and secrets.compare_digest(supplied.encode(), token.encode())
+
+
+async def require_internal_caller(request: Request):
+    if not is_internal_caller(request):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal token required",
+        )
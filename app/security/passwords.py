@@ -0,0 +1,110 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.exceptions import PasswordHasherBusyException
+from app.core.logger import logger
+
+# bcrypt costs the calibration may pick; each step doubles the work.
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 16
+
+
+@dataclass
+class PasswordHasherStats:
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    rejected: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a few dedicated threads.
+
+    bcrypt releases the GIL, so the event loop keeps serving other requests
+    meanwhile. At most ``workers`` hashes run at once and at most
+    ``max_queued`` more wait their turn; beyond that callers get
+    PasswordHasherBusyException instead of an ever longer wait.
+    """
+
+    def __init__(self, context: CryptContext, workers: int = 2, max_queued: int = 64):
+        self.context = context
+        self.workers = workers
+        self.max_queued = max_queued
+        self.stats = PasswordHasherStats()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        if self._slots.locked() and self.stats.queued >= self.max_queued:
+            self.stats.rejected += 1
+            raise PasswordHasherBusyException()
+        start = time.perf_counter()
+        self.stats.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.stats.queued -= 1
+        waited = time.perf_counter() - start
+        self.stats.wait_seconds_total += waited
+        self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+        self.stats.running += 1
+        try:
+            return await loop.run_in_executor(self._executor, function, *args)
+        finally:
+            self.stats.running -= 1
+            self.stats.completed += 1
+            self._slots.release()
+
+    def calibrate(self, budget_seconds: float, min_rounds: int) -> int:
+        """Switch to the highest bcrypt cost, not below ``min_rounds``, whose
+        hash takes at most ``budget_seconds`` here, and return it.
+
+        Blocks for a few hashes; hashes made with other costs still verify.
+        """
+        rounds = max(min_rounds, MIN_BCRYPT_ROUNDS)
+        elapsed = self._time_hash(rounds)
+        while rounds < MAX_BCRYPT_ROUNDS and elapsed * 2 <= budget_seconds:
+            rounds += 1
+            elapsed = self._time_hash(rounds)
+        self.context = self.context.copy(bcrypt__rounds=rounds)
+        logger.info(
+            f"bcrypt cost {rounds} takes {elapsed * 1000:.0f} ms "
+            f"(budget {budget_seconds * 1000:.0f} ms)."
+        )
+        return rounds
+
+    def _time_hash(self, rounds: int) -> float:
+        context = self.context.copy(bcrypt__rounds=rounds)
+        start = time.perf_counter()
+        context.hash("calibration")
+        return time.perf_counter() - start
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    CryptContext(schemes=["bcrypt"], deprecated="auto"),
+    workers=settings.password_hash_workers,
+    max_queued=settings.password_hash_max_queued,
+)
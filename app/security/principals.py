@@ -0,0 +1,138 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user_role import User, UserRole
+
+# Changing any of these makes the users resolved from earlier tokens stale.
+PRINCIPAL_ATTRIBUTES = ("username", "role", "hashed_password")
+
+
+@dataclass
+class PrincipalCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+
+def detached_user(user: User) -> User:
+    """A copy of ``user``'s columns that belongs to no session, so that it can
+    be shared between requests."""
+    return User(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        hashed_password=user.hashed_password,
+        role=user.role,
+        totp_secret=user.totp_secret,
+    )
+
+
+def user_from_claims(payload: dict) -> User:
+    """The user an access token describes, taken on trust from its claims."""
+    role = payload.get("role")
+    return User(
+        id=payload.get("uid"),
+        username=payload["sub"],
+        email=payload.get("email"),
+        role=UserRole(role) if role else None,
+    )
+
+
+class PrincipalCache:
+    """Users resolved from access tokens, keyed by the token signature.
+
+    An entry lives until its token expires or ``ttl_seconds`` pass, whichever
+    comes first, and is dropped as soon as this process commits a change to
+    the user's name, role or password. Changes committed by other workers
+    are seen here once the entries expire.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = PrincipalCacheStats()
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, signature: str) -> User | None:
+        expires_at, user = self._entries.get(signature, (0.0, None))
+        if expires_at <= time.monotonic():
+            self._entries.pop(signature, None)
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return user
+
+    def put(self, signature: str, user: User, token_expires_at: float) -> User:
+        """Cache ``user`` for the token until ``token_expires_at`` (Unix time)
+        at the latest, and return the cached copy."""
+        user = detached_user(user)
+        lifetime = min(self.ttl_seconds, token_expires_at - time.time())
+        if lifetime > 0:
+            self._entries[signature] = (time.monotonic() + lifetime, user)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, *usernames: str) -> None:
+        stale = [
+            signature
+            for signature, (_, user) in self._entries.items()
+            if user.username in usernames
+        ]
+        for signature in stale:
+            del self._entries[signature]
+        self.stats.invalidations += len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def build_principal_cache() -> PrincipalCache | None:
+    if not settings.principal_cache_enabled:
+        return None
+    return PrincipalCache(
+        max_entries=settings.principal_cache_max_entries,
+        ttl_seconds=settings.principal_cache_ttl_seconds,
+    )
+
+
+principal_cache = build_principal_cache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_stale_principals(session, flush_context):
+    stale = session.info.setdefault("stale_principals", set())
+    for user in session.deleted:
+        if isinstance(user, User):
+            stale.add(user.username)
+    for user in session.dirty:
+        if not isinstance(user, User):
+            continue
+        state = inspect(user)
+        if any(
+            state.attrs[attribute].history.has_changes()
+            for attribute in PRINCIPAL_ATTRIBUTES
+        ):
+            stale.add(user.username)
+            # A renamed user's entries are under the old name.
+            stale.update(state.attrs.username.history.deleted)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_principals(session):
+    stale = session.info.pop("stale_principals", None)
+    if stale and principal_cache is not None:
+        principal_cache.invalidate(*stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_principals(session):
+    session.info.pop("stale_principals", None)
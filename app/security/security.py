@@ -6,17 +6,20 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from app.core.config import settings
 from app.db.database import get_db
 from app.models.user_role import User, UserRole
+from app.security import principals
 from app.security.model import oauth2_scheme
-from app.services.user_services import UserService, pwd_context
+from app.security.passwords import password_hasher
+from app.services.user_services import UserService
 
 
 async def authenticate_user(
     session: AsyncSession, username_or_email: str, password: str
 ) -> User | None:
     user = await UserService.find_by_username_or_email(session, username_or_email)
-    if not user or not pwd_context.verify(password, user.hashed_password):
+    if not user or not await password_hasher.verify(password, user.hashed_password):
         return
     return user
 
@@ -45,11 +48,30 @@ async def decode_access_token(
         return
     if not username or not all(scope in token_scopes for scope in required_scopes):
         return
-    user = await UserService.find_by_username_or_email(db_session, username)
+    if settings.auth_trust_token_claims:
+        user = principals.user_from_claims(payload)
+    else:
+        user = await resolve_user(token, payload, db_session)
+        if user is None:
+            return
     user.scopes = token_scopes
     return user
 
 
+async def resolve_user(token: str, payload: dict, db_session: AsyncSession):
+    """The user a verified token names, from the principal cache if possible."""
+    cache = principals.principal_cache
+    if cache is None:
+        return await UserService.find_by_username_or_email(db_session, payload["sub"])
+    signature = token.rsplit(".", 1)[-1]
+    user = cache.get(signature)
+    if user is None:
+        user = await UserService.find_by_username_or_email(db_session, payload["sub"])
+        if user is not None:
+            user = cache.put(signature, user, payload.get("exp", 0))
+    return user
+
+
 async def decode_access_token_no_scope(
     token: str, db_session: AsyncSession
 ) -> User | None:
@@ -69,6 +91,8 @@ async def decode_access_token_no_scope(
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
+    # The primary: a replica may still grant a revoked role or accept the
+    # token of a user just deleted.
     session: AsyncSession = Depends(get_db),
     required_role: UserRole = UserRole.basic,
 ):
@@ -1,66 +1,1094 @@
-from sqlalchemy import select
+import asyncio
+import functools
+import re
+from collections import Counter
+
+from sqlalchemy import (
+    and_,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import MovieAlreadyExistsException, MovieNotFoundException
+from app.core.batching import GroupCommit
+from app.core.cache import CacheBackend, build_movie_cache
+from app.core.config import settings
+from app.core.exceptions import (
+    MovieAlreadyExistsException,
+    MovieNotFoundException,
+)
+from app.core.genres import GenreEntry, canonical_genre, genre_map
 from app.core.logger import logger
-from app.models.movie import Movie
+from app.core.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+from app.core.singleflight import SingleFlight
+from app.core.trigram import TrigramIndex
+from app.core.versions import CATALOG_KEY, VersionStore, build_version_store
+from app.db.database import async_session, shares_reads
+from app.models.movie import (
+    BulkConflictAction,
+    BulkItemStatus,
+    CreateMovie,
+    FacetName,
+    Genre,
+    Movie,
+    MovieFacet,
+    MovieSchema,
+    MovieSort,
+)
+
+EXPORT_CHUNK_SIZE = 1000
+BULK_BATCH_SIZE = 500
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+MOVIE_COLUMNS = (
+    Movie.id,
+    Movie.title,
+    Movie.genre_id,
+    Movie.director,
+    Movie.release_year,
+)
+COLUMN_KEYS = tuple(column.key for column in MOVIE_COLUMNS)
+# The column behind each field of MovieSchema; genre is rendered from its id.
+FIELD_COLUMNS = dict(zip(MovieSchema.model_fields, MOVIE_COLUMNS))
+
+# Keyset columns per sort field; ``id`` is always the tie-breaker.
+SORT_KEYS = {
+    "id": (Movie.id,),
+    "title": (Movie.title, Movie.id),
+    "release_year": (Movie.release_year, Movie.id),
+}
+
+SEARCH_TOKEN = re.compile(r"\w+")
+
+# Hot statements, built once. Executing the same statement object skips
+# constructing it per call, and its SQL text is stable, so drivers that cache
+# prepared statements by text (asyncpg) reuse them.
+MOVIE_BY_ID = select(Movie).where(Movie.id == bindparam("id"))
+MOVIES_BY_GENRE = select(Movie).where(Movie.genre_id == bindparam("genre_id"))
+ALL_GENRES = select(Genre.id, Genre.name, Genre.label)
+
+
+def _ranked_search(dialect: str, q: str):
+    """Select the movie columns plus a ``score`` (higher is better) for ``q``."""
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        vector = literal_column("movies.search_vector")
+        return select(*MOVIE_COLUMNS, func.ts_rank(vector, query).label("score")).where(
+            vector.op("@@")(query)
+        )
+
+    # FTS5 query syntax is strict; match every word of the input literally.
+    fts_query = " ".join(f'"{token}"' for token in SEARCH_TOKEN.findall(q))
+    fts = table("movies_fts", column("rowid"))
+    fts_name = literal_column(fts.name)
+    return (
+        select(*MOVIE_COLUMNS, (-func.bm25(fts_name)).label("score"))
+        .join_from(Movie.__table__, fts, fts.c.rowid == Movie.id)
+        .where(fts_name.op("MATCH")(fts_query))
+    )
+
+
+def _keyset_types(keys) -> tuple:
+    """The types a cursor may hold for each of ``keys``; None for NULLs."""
+    return tuple(
+        (
+            (key.type.python_type, type(None))
+            if key.expression.nullable
+            else key.type.python_type
+        )
+        for key in keys
+    )
+
+
+def _keyset_order(keys, descending: bool) -> list:
+    """ORDER BY ``keys``, NULL sort values last ascending and first descending,
+    which is also how a default PostgreSQL index orders them."""
+    order = []
+    for key in keys:
+        clause = key.desc() if descending else key.asc()
+        if key.expression.nullable:
+            clause = clause.nulls_first() if descending else clause.nulls_last()
+        order.append(clause)
+    return order
+
+
+def _keyset_after(keys, position: list, descending: bool):
+    """Rows that come after ``position`` in the ``_keyset_order`` of ``keys``."""
+    first, tie_breaker = keys[0], keys[-1]
+    if not first.expression.nullable:
+        if descending:
+            return tuple_(*keys) < tuple_(*position)
+        return tuple_(*keys) > tuple_(*position)
+    # A row-value comparison with a NULL is never true, so NULLs get their own
+    # branch.
+    value, last_id = position
+    if descending:
+        if value is None:
+            return or_(first.is_not(None), and_(first.is_(None), tie_breaker < last_id))
+        return tuple_(*keys) < tuple_(*position)
+    if value is None:
+        return and_(first.is_(None), tie_breaker > last_id)
+    return or_(tuple_(*keys) > tuple_(*position), first.is_(None))
+
+
+# The score of a ranked-results cursor, then the movie id.
+RANKED_CURSOR_TYPES = ((int, float), int)
+
+
+def _decode_ranked_cursor(cursor: str | None, cursor_key: str):
+    """Return the (score, id) position stored in a ranked-results cursor."""
+    if cursor is None:
+        return None
+    return tuple(decode_cursor(cursor, cursor_key, RANKED_CURSOR_TYPES))
+
+
+def facet_values(genre, director, release_year) -> list[tuple[str, str]]:
+    """The (facet, value) pairs a movie is counted under."""
+    values = []
+    if genre is not None:
+        values.append((FacetName.genre.value, genre))
+    if release_year is not None:
+        values.append((FacetName.decade.value, f"{release_year // 10 * 10}s"))
+    if director is not None:
+        values.append((FacetName.director.value, director))
+    return values
+
+
+def _facet_changes_sql(added: str | None = None, removed: str | None = None) -> str:
+    """INSERT ... ON CONFLICT that counts the movies of the ``added`` CTE in
+    the facet table and uncounts those of ``removed`` (PostgreSQL).
+
+    Mirrors facet_values. Run as a CTE of the movie write itself, the counts
+    move without a round trip of their own.
+    """
+    parts = []
+    for movies, delta in ((added, 1), (removed, -1)):
+        if movies is None:
+            continue
+        parts += [
+            f"SELECT '{FacetName.genre.value}', genres.label, {delta} FROM {movies} "
+            f"JOIN genres ON genres.id = {movies}.genre_id",
+            f"SELECT '{FacetName.decade.value}', "
+            f"({movies}.release_year / 10 * 10)::text || 's', {delta} FROM {movies} "
+            f"WHERE {movies}.release_year IS NOT NULL",
+            f"SELECT '{FacetName.director.value}', {movies}.director, {delta} "
+            f"FROM {movies} WHERE {movies}.director IS NOT NULL",
+        ]
+    # Sorted like _apply_facet_deltas sorts its rows, against deadlocks.
+    return (
+        "INSERT INTO movie_facets (facet, value, count) "
+        "SELECT facet, value, sum(delta) "
+        f"FROM ({' UNION ALL '.join(parts)}) AS changes (facet, value, delta) "
+        "GROUP BY facet, value HAVING sum(delta) <> 0 ORDER BY facet, value "
+        "ON CONFLICT (facet, value) "
+        "DO UPDATE SET count = movie_facets.count + excluded.count"
+    )
+
+
+# Movie writes that also move the facet counts, in one statement each
+# (PostgreSQL). Plain SQL because SQLAlchemy cannot cache INSERT ... ON
+# CONFLICT constructs and would compile them on every execution.
+RETURNED_COLUMNS = ", ".join(COLUMN_KEYS)
+CREATE_MOVIE_COUNTING_FACETS = select(Movie).from_statement(
+    text(
+        "WITH added AS (INSERT INTO movies (title, genre_id, director, release_year) "
+        "VALUES (:title, :genre_id, :director, :release_year) "
+        f"RETURNING {RETURNED_COLUMNS}), "
+        f"facet_changes AS ({_facet_changes_sql(added='added')}) "
+        "SELECT * FROM added"
+    )
+)
+UPDATE_MOVIE_COUNTING_FACETS = select(Movie).from_statement(
+    text(
+        # Locking the row keeps a concurrent update from uncounting the
+        # replaced values twice.
+        "WITH previous AS (SELECT id, genre_id, director, release_year FROM movies "
+        "WHERE id = :id FOR UPDATE), "
+        "updated AS (UPDATE movies "
+        "SET title = :title, director = :director, release_year = :release_year "
+        "FROM previous WHERE movies.id = previous.id "
+        f"RETURNING {', '.join(f'movies.{key}' for key in COLUMN_KEYS)}), "
+        "facet_changes AS "
+        f"({_facet_changes_sql(added='updated', removed='previous')}) "
+        "SELECT * FROM updated"
+    )
+)
+DELETE_MOVIE_COUNTING_FACETS = select(Movie).from_statement(
+    text(
+        f"WITH removed AS (DELETE FROM movies WHERE id = :id RETURNING {RETURNED_COLUMNS}), "
+        f"facet_changes AS ({_facet_changes_sql(removed='removed')}) "
+        "SELECT * FROM removed"
+    )
+)
+
+
+def _counts_facets_in_statement(db: AsyncSession) -> bool:
+    """Whether movie writes on ``db`` move the facet counts in the same
+    statement; other databases take a second one."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+FACETS_KEY = "facets"
+
+
+def movie_key(movie_id: int) -> str:
+    return f"movie:{movie_id}"
+
+
+def genre_key(genre: str) -> str:
+    return f"genre:{canonical_genre(genre)}"
+
+
+def field_columns(fields, *extra):
+    """The columns to select for ``fields``, plus ``extra`` ones, each once."""
+    columns = [FIELD_COLUMNS[field] for field in fields] + list(extra)
+    return list({column.key: column for column in columns}.values())
+
+
+@functools.lru_cache(maxsize=512)
+def sparse_select(fields: tuple[str, ...], key: str):
+    """The statement selecting ``fields`` of movies whose ``key`` column
+    equals the ``key`` parameter, built once per field list."""
+    return select(*field_columns(fields)).where(getattr(Movie, key) == bindparam(key))
+
+
+def sparse_rows(rows, fields) -> list[dict]:
+    """Movies of only ``fields`` from rows selected with ``field_columns``,
+    whose leading columns are those of ``fields`` in order."""
+    movies = [dict(zip(fields, row)) for row in rows]
+    if "genre" in fields:
+        for movie in movies:
+            movie["genre"] = genre_map.label(movie["genre"])
+    return movies
+
+
+def movie_row(row) -> dict:
+    """A movie in the API's shape from a row holding the MOVIE_COLUMNS."""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "genre": genre_map.label(row.genre_id),
+        "director": row.director,
+        "release_year": row.release_year,
+    }
 
 
 class MovieService:
+    # Read-through cache for lookups by id and genre; None disables it.
+    cache: CacheBackend | None = build_movie_cache()
+    # Write counters behind the ETags of movie reads.
+    versions: VersionStore = build_version_store()
+    # Fallback for fuzzy title search when the database lacks pg_trgm.
+    fuzzy_index = TrigramIndex()
+    # Shares one in-flight query among concurrent identical reads; None
+    # disables it.
+    reads: SingleFlight | None = (
+        SingleFlight() if settings.movie_read_coalescing else None
+    )
+    # Writes the movies of concurrent create_movie calls with one INSERT and
+    # commit; None gives each call its own transaction.
+    writes: GroupCommit | None = (
+        GroupCommit(
+            lambda movies: MovieService._create_batch(movies),
+            settings.movie_write_batch_window_ms / 1000,
+            settings.movie_write_batch_size,
+        )
+        if settings.movie_write_batching
+        else None
+    )
+    # Sessions for the batches of ``writes``, which span several requests.
+    write_session = async_session
+    _fuzzy_index_lock = asyncio.Lock()
+    # Writes made while a new fuzzy index is being built, replayed onto it.
+    _fuzzy_index_writes: list[tuple[int, str | None]] | None = None
+    _pg_trgm_available: bool | None = None
+
     @classmethod
-    async def create_movie(cls, movie: Movie, db: AsyncSession):
-        existing_movie = await db.execute(select(Movie).filter_by(title=movie.title))
-        if existing_movie.scalars().first():
+    async def create_movie(cls, movie: CreateMovie, db: AsyncSession):
+        if cls.writes is not None:
+            created = await cls.writes.submit(movie)
+            # Nothing to write; runs the session's commit hooks, such as the
+            # read-your-writes pin, as if the movie was written through it.
+            await db.commit()
+            return created
+        genres = await cls._resolve_genres([movie.genre], db)
+        genre = genres[canonical_genre(movie.genre)]
+        values = {**movie.model_dump(exclude={"genre"}), "genre_id": genre.id}
+        facets_in_statement = _counts_facets_in_statement(db)
+        try:
+            # The unique title index rejects duplicates; no check-then-insert.
+            if facets_in_statement:
+                result = await db.execute(CREATE_MOVIE_COUNTING_FACETS, values)
+            else:
+                result = await db.execute(insert(Movie).values(values).returning(Movie))
+            movie = result.scalar_one()
+        except IntegrityError:
+            await db.rollback()
             raise MovieAlreadyExistsException(movie.title)
-        db.add(movie)
-        await db.commit()  # Commit the transaction
-        await db.refresh(movie)  # Refresh to get the ID of the new movie
+        if not facets_in_statement:
+            await cls._apply_facet_deltas(
+                Counter(facet_values(genre.label, movie.director, movie.release_year)),
+                db,
+            )
+        await cls._commit_write(movie, db, genres=[genre])
         logger.info(f"Movie '{movie.title}' created successfully.")
         return movie
 
+    @classmethod
+    async def _create_batch(cls, movies: list[CreateMovie]):
+        """Insert a batch of ``writes`` in one transaction, giving each movie
+        its created row or the conflict with a title already taken."""
+        async with cls.write_session() as db:
+            results = await cls.bulk_upsert_movies(
+                movies, db, on_conflict=BulkConflictAction.skip
+            )
+        return [
+            (
+                MovieSchema(**result["movie"])
+                if result["status"] is BulkItemStatus.created
+                else MovieAlreadyExistsException(result["title"])
+            )
+            for result in results
+        ]
+
+    @classmethod
+    async def bulk_upsert_movies(
+        cls,
+        movies: list[CreateMovie],
+        db: AsyncSession,
+        on_conflict: BulkConflictAction = BulkConflictAction.update,
+    ):
+        """Insert or update ``movies`` by title in multi-row statements, a
+        batch at a time: one insert, then for titles that exist one locking
+        read and one upsert.
+
+        Returns one ``{"title", "status", "movie"}`` entry per input item, in
+        input order. Repeated titles within the payload are skipped after their
+        first occurrence.
+        """
+        dialect = db.get_bind().dialect.name
+        upsert = UPSERT_DIALECTS[dialect]
+        unique = {}
+        for movie in movies:
+            unique.setdefault(movie.title, movie)
+        unique = list(unique.values())
+        genres = await cls._resolve_genres([movie.genre for movie in unique], db)
+        labels = {genre.id: genre.label for genre in genres.values()}
+
+        outcomes = {}
+        stale = set()
+        facet_deltas = Counter()
+        for start in range(0, len(unique), BULK_BATCH_SIZE):
+            batch = {
+                movie.title: {
+                    **movie.model_dump(exclude={"genre"}),
+                    "genre_id": genres[canonical_genre(movie.genre)].id,
+                }
+                for movie in unique[start : start + BULK_BATCH_SIZE]
+            }
+            pending = list(batch)
+            while pending:
+                # Statuses come from the statements' own results, not from an
+                # earlier read a concurrent insert could have overtaken. DO
+                # NOTHING returns only the rows it actually inserted.
+                result = await db.execute(
+                    upsert(Movie.__table__)
+                    .values([batch[title] for title in pending])
+                    .on_conflict_do_nothing(index_elements=[Movie.title])
+                    .returning(*MOVIE_COLUMNS)
+                )
+                for row in result.all():
+                    facet_deltas.update(
+                        facet_values(
+                            labels[row.genre_id], row.director, row.release_year
+                        )
+                    )
+                    outcomes[row.title] = (BulkItemStatus.created, row)
+                    stale.update((movie_key(row.id), genre_key(labels[row.genre_id])))
+                taken = [title for title in pending if title not in outcomes]
+                if on_conflict is BulkConflictAction.skip or not taken:
+                    break
+
+                # The other titles exist. Locked, they stay as read until
+                # commit, so their replaced values move the facet counts and
+                # the update cannot turn into an insert.
+                result = await db.execute(
+                    select(
+                        Movie.title,
+                        Movie.genre_id,
+                        Movie.director,
+                        Movie.release_year,
+                    )
+                    .where(Movie.title.in_(taken))
+                    .with_for_update()
+                )
+                existing = {row.title: row for row in result.all()}
+                if existing:
+                    await cls._ensure_genres(
+                        db, [row.genre_id for row in existing.values()]
+                    )
+                    labels.update(
+                        (row.genre_id, genre_map.label(row.genre_id))
+                        for row in existing.values()
+                    )
+                    statement = upsert(Movie.__table__).values(
+                        [batch[title] for title in existing]
+                    )
+                    statement = statement.on_conflict_do_update(
+                        index_elements=[Movie.title],
+                        set_={
+                            column: statement.excluded[column]
+                            for column in COLUMN_KEYS
+                            if column not in ("id", "title")
+                        },
+                    )
+                    result = await db.execute(statement.returning(*MOVIE_COLUMNS))
+                    for row in result.all():
+                        previous = existing[row.title]
+                        stale.add(genre_key(labels[previous.genre_id]))
+                        facet_deltas.subtract(
+                            facet_values(
+                                labels[previous.genre_id],
+                                previous.director,
+                                previous.release_year,
+                            )
+                        )
+                        facet_deltas.update(
+                            facet_values(
+                                labels[row.genre_id], row.director, row.release_year
+                            )
+                        )
+                        outcomes[row.title] = (BulkItemStatus.updated, row)
+                        stale.update(
+                            (movie_key(row.id), genre_key(labels[row.genre_id]))
+                        )
+                # Titles deleted since the insert skipped them go round again.
+                pending = [title for title in taken if title not in existing]
+        await cls._apply_facet_deltas(facet_deltas, db)
+        await db.commit()
+        cls._remember_genres(genres.values())
+        outcomes = {
+            title: (status, movie_row(row)) for title, (status, row) in outcomes.items()
+        }
+        for _, movie in outcomes.values():
+            cls._index_title(movie["id"], movie["title"])
+        if outcomes:
+            await cls.versions.bump(
+                *(movie_key(movie["id"]) for _, movie in outcomes.values())
+            )
+        await cls._invalidate(*stale)
+        logger.info(f"Bulk upserted {len(outcomes)} of {len(movies)} movies.")
+
+        results = []
+        reported = set()
+        for movie in movies:
+            status, row = outcomes.get(movie.title, (BulkItemStatus.skipped, None))
+            if movie.title in reported:
+                status, row = BulkItemStatus.skipped, None
+            reported.add(movie.title)
+            results.append({"title": movie.title, "status": status, "movie": row})
+        return results
+
     @classmethod
     async def get_all_movies(cls, db: AsyncSession):
         result = await db.execute(select(Movie))
         movies = result.scalars().all()  # Get all movies as a list
+        await cls._ensure_genres(db, [movie.genre_id for movie in movies])
         return movies
 
     @classmethod
-    async def get_movie_by_id(cls, movie_id: int, db: AsyncSession):
+    async def get_movies_page(
+        cls,
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        sort: MovieSort = MovieSort.id,
+        genre: str | None = None,
+        director: str | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        fields: list[str] | None = None,
+    ):
+        """Return one page of movies and the cursor for the next one (or None).
+
+        Pages are fetched by keyset rather than OFFSET, so the cost of a page does
+        not grow with how deep the client has paged. The filters are combined in
+        the same query; the (genre, release_year) and (director, release_year)
+        indexes serve them together with the release year sort.
+
+        With ``fields``, only those columns are selected and the movies are
+        dicts of just those keys.
+        """
+        descending = sort.value.startswith("-")
+        keys = SORT_KEYS[sort.value.lstrip("-")]
+        if fields is None:
+            statement = select(Movie)
+        else:
+            statement = select(*field_columns(fields, *keys))
+        if genre is not None:
+            genre_id = await cls._genre_id(genre, db)
+            if genre_id is None:
+                return [], None
+            statement = statement.where(Movie.genre_id == genre_id)
+        if director is not None:
+            statement = statement.where(Movie.director == director)
+        if year_from is not None:
+            statement = statement.where(Movie.release_year >= year_from)
+        if year_to is not None:
+            statement = statement.where(Movie.release_year <= year_to)
+        if cursor is not None:
+            position = decode_cursor(cursor, sort.value, _keyset_types(keys))
+            statement = statement.where(_keyset_after(keys, position, descending))
+        statement = statement.order_by(*_keyset_order(keys, descending)).limit(
+            limit + 1
+        )
+
+        result = await db.execute(statement)
+        movies = result.all() if fields else result.scalars().all()
+        if fields is None or "genre" in fields:
+            await cls._ensure_genres(db, [movie.genre_id for movie in movies])
+        next_cursor = None
+        if len(movies) > limit:
+            movies = movies[:limit]
+            last = movies[-1]
+            next_cursor = encode_cursor(
+                sort.value, [getattr(last, key.key) for key in keys]
+            )
+        if fields is not None:
+            movies = sparse_rows(movies, fields)
+        return movies, next_cursor
+
+    @classmethod
+    async def search_movies(
+        cls,
+        q: str,
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Full-text search over title and director, best matches first.
+
+        Returns one page of movies and the cursor for the next one (or None).
+        """
+        if not SEARCH_TOKEN.search(q):
+            return [], None
+        ranked = _ranked_search(db.get_bind().dialect.name, q)
+        return await cls._ranked_page(ranked, f"search:{q}", db, limit, cursor)
+
+    @classmethod
+    async def fuzzy_search_movies(
+        cls,
+        q: str,
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Typo-tolerant title search by trigram similarity, best matches first.
+
+        Uses pg_trgm when the database has it and the in-process trigram index
+        otherwise. Returns one page of movies and the cursor for the next one.
+        """
+        cursor_key = f"fuzzy:{q}"
+        threshold = settings.fuzzy_similarity_threshold
+        if await cls._has_pg_trgm(db):
+            score = func.similarity(Movie.title, q)
+            ranked = select(*MOVIE_COLUMNS, score.label("score")).where(
+                Movie.title.op("%")(q), score >= threshold
+            )
+            return await cls._ranked_page(ranked, cursor_key, db, limit, cursor)
+
+        index = await cls._fuzzy_index(db)
+        matches = index.search(q, threshold)
+        position = _decode_ranked_cursor(cursor, cursor_key)
+        if position is not None:
+            score, movie_id = position
+            matches = [
+                (match_score, match_id)
+                for match_score, match_id in matches
+                if match_score < score or (match_score == score and match_id > movie_id)
+            ]
+        page = matches[: limit + 1]
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(cursor_key, list(page[-1]))
+        ids = [movie_id for _, movie_id in page]
+        result = await db.execute(select(*MOVIE_COLUMNS).where(Movie.id.in_(ids)))
+        rows = result.all()
+        await cls._ensure_genres(db, [row.genre_id for row in rows])
+        rows = {row.id: movie_row(row) for row in rows}
+        return [rows[movie_id] for movie_id in ids if movie_id in rows], next_cursor
+
+    @classmethod
+    async def _ranked_page(cls, ranked, cursor_key, db, limit, cursor):
+        """Keyset-paginate ``ranked``, a select of the movie columns plus a
+        ``score`` (higher is better), by (score desc, id)."""
+        ranked = ranked.subquery()
+        statement = select(*(ranked.c[key] for key in COLUMN_KEYS), ranked.c.score)
+        position = _decode_ranked_cursor(cursor, cursor_key)
+        if position is not None:
+            score, movie_id = position
+            statement = statement.where(
+                or_(
+                    ranked.c.score < score,
+                    and_(ranked.c.score == score, ranked.c.id > movie_id),
+                )
+            )
+        statement = statement.order_by(ranked.c.score.desc(), ranked.c.id).limit(
+            limit + 1
+        )
+
+        result = await db.execute(statement)
+        rows = result.all()
+        await cls._ensure_genres(db, [row.genre_id for row in rows])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(cursor_key, [rows[-1].score, rows[-1].id])
+        return [movie_row(row) for row in rows], next_cursor
+
+    @classmethod
+    async def _has_pg_trgm(cls, db: AsyncSession) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        if cls._pg_trgm_available is None:
+            result = await db.execute(
+                select(literal_column("1"))
+                .select_from(table("pg_extension", column("extname")))
+                .where(column("extname") == "pg_trgm")
+            )
+            cls._pg_trgm_available = result.first() is not None
+        return cls._pg_trgm_available
+
+    @classmethod
+    async def _fuzzy_index(cls, db: AsyncSession) -> TrigramIndex:
+        # Writes keep the index current incrementally; the periodic rebuild
+        # picks up writes made by other workers.
+        max_age = settings.fuzzy_index_max_age_seconds
+        index = cls.fuzzy_index
+        if not index.is_stale(max_age):
+            return index
+        if index.built_at is not None and cls._fuzzy_index_lock.locked():
+            # Another request is building its replacement; serve this one.
+            return index
+        async with cls._fuzzy_index_lock:
+            if cls.fuzzy_index.is_stale(max_age):
+                cls._fuzzy_index_writes = []
+                try:
+                    result = await db.execute(select(Movie.id, Movie.title))
+                    # Building takes seconds for large catalogs; doing it on a
+                    # thread keeps the event loop serving other requests.
+                    fresh = await asyncio.to_thread(TrigramIndex.build, result.all())
+                    for movie_id, title in cls._fuzzy_index_writes:
+                        if title is None:
+                            fresh.remove(movie_id)
+                        else:
+                            fresh.add(movie_id, title)
+                finally:
+                    cls._fuzzy_index_writes = None
+                cls.fuzzy_index = fresh
+                logger.info(f"Rebuilt fuzzy index of {len(fresh)} titles.")
+        return cls.fuzzy_index
+
+    @classmethod
+    def _index_title(cls, movie_id: int, title: str | None) -> None:
+        """Add or, with no title, remove a movie in the fuzzy index."""
+        if title is None:
+            cls.fuzzy_index.remove(movie_id)
+        else:
+            cls.fuzzy_index.add(movie_id, title)
+        if cls._fuzzy_index_writes is not None:
+            cls._fuzzy_index_writes.append((movie_id, title))
+
+    @classmethod
+    async def stream_movies(cls, db: AsyncSession, chunk_size: int = EXPORT_CHUNK_SIZE):
+        """Yield the whole catalog in lists of at most ``chunk_size`` movies.
+
+        Rows come from a server-side cursor, so only one chunk is held in memory.
+        """
+        result = await db.stream_scalars(
+            select(Movie).order_by(Movie.id).execution_options(yield_per=chunk_size)
+        )
+        async for movies in result.partitions():
+            await cls._ensure_genres(db, [movie.genre_id for movie in movies])
+            yield movies
+
+    @classmethod
+    async def get_movie_by_id(
+        cls, movie_id: int, db: AsyncSession, fields: list[str] | None = None
+    ):
+        return await cls._coalesce(
+            (movie_key(movie_id), fields and tuple(fields)),
+            lambda: cls._read_movie_by_id(movie_id, db, fields),
+            db,
+        )
+
+    @classmethod
+    async def _read_movie_by_id(
+        cls, movie_id: int, db: AsyncSession, fields: list[str] | None = None
+    ):
+        """Return the movie, or a dict of only ``fields`` when given.
+
+        Sparse reads select just those columns and are not cached, but are
+        served from a full cached entry when there is one.
+        """
+        cached = await cls._cache_get(movie_key(movie_id), db)
+        if cached is not None:
+            if fields is not None:
+                return {field: cached[field] for field in fields}
+            return MovieSchema(**cached)
         logger.debug(f"Fetching movie with ID {movie_id}")
-        result = await db.execute(select(Movie).where(Movie.id == movie_id))
+        if fields is not None:
+            result = await db.execute(
+                sparse_select(tuple(fields), "id"), {"id": movie_id}
+            )
+            row = result.first()
+            if row is None:
+                logger.error(f"Movie with ID {movie_id} not found.")
+                raise MovieNotFoundException(movie_id)
+            if "genre" in fields:
+                await cls._ensure_genres(db, [row.genre_id])
+            return sparse_rows([row], fields)[0]
+        since = await cls._cache_version(movie_key(movie_id), db)
+        result = await db.execute(MOVIE_BY_ID, {"id": movie_id})
         movie = result.scalar_one_or_none()
         if movie is None:
             logger.error(f"Movie with ID {movie_id} not found.")
             raise MovieNotFoundException(movie_id)
+        await cls._ensure_genres(db, [movie.genre_id])
+        movie = MovieSchema.model_validate(movie)
+        await cls._cache_set(movie_key(movie_id), movie.model_dump(), since)
         return movie
 
     @classmethod
-    async def update_movie(cls, movie_id: int, updated_movie: Movie, db: AsyncSession):
-        result = await db.execute(select(Movie).where(Movie.id == movie_id))
-        movie = result.scalar_one_or_none()
+    async def update_movie(
+        cls, movie_id: int, updated_movie: MovieSchema, db: AsyncSession
+    ):
+        values = {
+            "title": updated_movie.title,
+            "director": updated_movie.director,
+            "release_year": updated_movie.release_year,
+        }
+        if _counts_facets_in_statement(db):
+            try:
+                result = await db.execute(
+                    UPDATE_MOVIE_COUNTING_FACETS, {**values, "id": movie_id}
+                )
+                movie = result.scalar_one_or_none()
+            except IntegrityError:
+                await db.rollback()
+                raise MovieAlreadyExistsException(updated_movie.title)
+            if movie is None:
+                await db.rollback()
+                raise MovieNotFoundException(movie_id)
+            await cls._ensure_genres(db, [movie.genre_id])
+            await cls._commit_write(movie, db)
+            return movie
+
+        result = await db.execute(
+            select(Movie.genre_id, Movie.director, Movie.release_year)
+            .where(Movie.id == movie_id)
+            .with_for_update()
+        )
+        previous = result.first()
+        if previous is None:
+            await db.rollback()
+            raise MovieNotFoundException(movie_id)
+        statement = (
+            update(Movie).where(Movie.id == movie_id).values(values).returning(Movie)
+        )
+        try:
+            result = await db.execute(statement)
+            movie = result.scalar_one_or_none()
+        except IntegrityError:
+            await db.rollback()
+            raise MovieAlreadyExistsException(updated_movie.title)
         if movie is None:
+            await db.rollback()
             raise MovieNotFoundException(movie_id)
-
-        movie.title = updated_movie.title
-        movie.director = updated_movie.director
-        movie.release_year = updated_movie.release_year
-        await db.commit()
-        await db.refresh(movie)
+        await cls._ensure_genres(db, [movie.genre_id, previous.genre_id])
+        facet_deltas = Counter(
+            facet_values(movie.genre, movie.director, movie.release_year)
+        )
+        facet_deltas.subtract(
+            facet_values(
+                genre_map.label(previous.genre_id),
+                previous.director,
+                previous.release_year,
+            )
+        )
+        await cls._apply_facet_deltas(facet_deltas, db)
+        await cls._commit_write(movie, db)
         return movie
 
     @classmethod
     async def delete_movie(cls, movie_id: int, db: AsyncSession):
-        result = await db.execute(select(Movie).where(Movie.id == movie_id))
+        facets_in_statement = _counts_facets_in_statement(db)
+        if facets_in_statement:
+            result = await db.execute(DELETE_MOVIE_COUNTING_FACETS, {"id": movie_id})
+        else:
+            result = await db.execute(
+                delete(Movie).where(Movie.id == movie_id).returning(Movie)
+            )
         movie = result.scalar_one_or_none()
-
         if movie is not None:
-            await db.delete(movie)
-            await db.commit()
-
+            await cls._ensure_genres(db, [movie.genre_id])
+            if not facets_in_statement:
+                facet_deltas = Counter()
+                facet_deltas.subtract(
+                    facet_values(movie.genre, movie.director, movie.release_year)
+                )
+                await cls._apply_facet_deltas(facet_deltas, db)
+            await cls._commit_write(movie, db, deleted=True)
         return movie
 
     @classmethod
-    async def get_movies_by_genre(cls, genre: str, db: AsyncSession):
-        result = await db.execute(select(Movie).where(Movie.genre == genre))
-        movies = result.scalars().all()
+    async def _apply_facet_deltas(cls, deltas: Counter, db: AsyncSession):
+        """Add ``deltas``, a count change per (facet, value), to the facet
+        table as part of the caller's transaction."""
+        rows = [
+            {"facet": facet, "value": value, "count": delta}
+            for (facet, value), delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+        # Sorted rows make concurrent writers lock facet rows in the same
+        # order, so they queue instead of deadlocking.
+        upsert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+        statement = upsert(MovieFacet.__table__).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[MovieFacet.facet, MovieFacet.value],
+            set_={"count": MovieFacet.count + statement.excluded["count"]},
+        )
+        await db.execute(statement)
+
+    @classmethod
+    async def get_facets(cls, db: AsyncSession, top_directors: int = 10):
+        return await cls._coalesce(
+            (FACETS_KEY, top_directors),
+            lambda: cls._read_facets(db, top_directors),
+            db,
+        )
+
+    @classmethod
+    async def _read_facets(cls, db: AsyncSession, top_directors: int = 10):
+        """Return movie counts per genre, per release decade and for the
+        ``top_directors`` directors with the most movies.
+
+        Reads the facet table maintained by the writes; nothing is aggregated
+        over the movies table.
+        """
+        result = await db.execute(
+            select(MovieFacet.facet, MovieFacet.value, MovieFacet.count)
+            .where(
+                MovieFacet.facet.in_([FacetName.genre.value, FacetName.decade.value]),
+                MovieFacet.count > 0,
+            )
+            .order_by(MovieFacet.count.desc(), MovieFacet.value)
+        )
+        facets = {FacetName.genre.value: [], FacetName.decade.value: []}
+        for facet, value, count in result.all():
+            facets[facet].append({"value": value, "count": count})
+        result = await db.execute(
+            select(MovieFacet.value, MovieFacet.count)
+            .where(MovieFacet.facet == FacetName.director.value, MovieFacet.count > 0)
+            .order_by(MovieFacet.count.desc(), MovieFacet.value)
+            .limit(top_directors)
+        )
+        return {
+            "genres": facets[FacetName.genre.value],
+            "decades": sorted(
+                facets[FacetName.decade.value], key=lambda decade: decade["value"]
+            ),
+            "directors": [
+                {"value": value, "count": count} for value, count in result.all()
+            ],
+        }
+
+    @classmethod
+    async def _commit_write(
+        cls, movie: Movie, db: AsyncSession, deleted=False, genres=()
+    ):
+        # RETURNING already loaded every column; detaching the instance keeps
+        # commit() from expiring it and forcing a refresh round trip.
+        if movie in db:
+            db.expunge(movie)
+        await db.commit()
+        cls._remember_genres(genres)
+        cls._index_title(movie.id, None if deleted else movie.title)
+        await cls.versions.bump(movie_key(movie.id))
+        await cls._invalidate(movie_key(movie.id), genre_key(movie.genre))
+
+    @classmethod
+    async def _resolve_genres(cls, names, db: AsyncSession) -> dict:
+        """Map the canonical form of each of ``names`` to its genre row,
+        inserting the genres not stored yet.
+
+        New rows only become visible to other transactions on commit, so the
+        caller hands them to ``_remember_genres`` once it has committed.
+        """
+        genres = {}
+        missing = {}
+        for name in names:
+            genre_id = genre_map.id(name)
+            if genre_id is None:
+                missing.setdefault(canonical_genre(name), name.strip())
+            else:
+                genres[canonical_genre(name)] = GenreEntry(
+                    genre_id, canonical_genre(name), genre_map.label(genre_id)
+                )
+        if missing:
+            upsert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+            await db.execute(
+                upsert(Genre.__table__)
+                .values(
+                    [
+                        {"name": name, "label": label}
+                        for name, label in sorted(missing.items())
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[Genre.name])
+            )
+            result = await db.execute(
+                select(Genre.id, Genre.name, Genre.label).where(Genre.name.in_(missing))
+            )
+            for row in result.all():
+                genres[row.name] = row
+        return genres
+
+    @classmethod
+    def _remember_genres(cls, genres):
+        for genre in genres:
+            genre_map.add(genre.id, genre.name, genre.label)
+
+    @classmethod
+    async def _ensure_genres(cls, db: AsyncSession, genre_ids):
+        """Load the genre map again if it lacks any of ``genre_ids``, e.g.
+        genres another worker created."""
+        if not genre_map.has_ids(genre_ids):
+            await cls._load_genres(db)
+
+    @classmethod
+    async def _genre_id(cls, genre: str, db: AsyncSession) -> int | None:
+        genre_id = genre_map.id(genre)
+        if genre_id is None and not genre_map.loaded_within(
+            settings.genre_reload_interval_seconds
+        ):
+            await cls._load_genres(db)
+            genre_id = genre_map.id(genre)
+        return genre_id
+
+    @classmethod
+    async def _load_genres(cls, db: AsyncSession):
+        result = await db.execute(ALL_GENRES)
+        cls._remember_genres(result.all())
+        genre_map.mark_loaded()
+
+    @classmethod
+    async def _coalesce(cls, key, read, db: AsyncSession):
+        """Run ``read``, or wait for the identical read already in flight.
+
+        Only the caller running the read touches its database session; the
+        others get its result or exception once it finishes. Reads on
+        sessions that do not share them always run on their own.
+        """
+        if cls.reads is None or not shares_reads(db):
+            return await read()
+        return await cls.reads.do(key, read)
+
+    @classmethod
+    async def _invalidate(cls, *keys: str):
+        # Every write moves the facet counts.
+        if cls.reads is not None:
+            cls.reads.forget(FACETS_KEY, *keys)
+        if cls.cache is not None:
+            await cls.cache.delete(*keys)
+
+    @classmethod
+    async def _cache_get(cls, key: str, db: AsyncSession):
+        if cls.cache is None or not shares_reads(db):
+            return None
+        return await cls.cache.get(key)
+
+    @classmethod
+    async def _cache_version(cls, version_key: str, db: AsyncSession):
+        """Read before a cacheable read's SELECT and handed to ``_cache_set``;
+        None when the read is not to be cached."""
+        if cls.cache is None or not shares_reads(db):
+            return None
+        return version_key, await cls.versions.get(version_key)
+
+    @classmethod
+    async def _cache_set(cls, key: str, value, since):
+        """Cache ``value``, read after ``since`` was taken, unless a write to
+        its version key ran in between.
+
+        That write may have invalidated ``key`` before ``value`` got here,
+        and storing it would bring the replaced row back until the TTL.
+        """
+        if since is None:
+            return
+        version_key, version = since
+        await cls.cache.set(key, value)
+        # Checked after storing: writes bump the version before invalidating,
+        # so a write this check misses deletes the entry itself.
+        if await cls.versions.get(version_key) != version:
+            await cls.cache.delete(key)
+
+    @classmethod
+    async def get_movies_by_genre(
+        cls, genre: str, db: AsyncSession, fields: list[str] | None = None
+    ):
+        return await cls._coalesce(
+            (genre_key(genre), fields and tuple(fields)),
+            lambda: cls._read_movies_by_genre(genre, db, fields),
+            db,
+        )
+
+    @classmethod
+    async def _read_movies_by_genre(
+        cls, genre: str, db: AsyncSession, fields: list[str] | None = None
+    ):
+        """Return the movies of ``genre``, or dicts of only ``fields`` when
+        given; sparse reads are handled as in ``_read_movie_by_id``."""
+        cached = await cls._cache_get(genre_key(genre), db)
+        if cached is not None:
+            if fields is not None:
+                return [{field: movie[field] for field in fields} for movie in cached]
+            return [MovieSchema(**movie) for movie in cached]
+        since = None
+        if fields is None:
+            # Any write can move a movie into or out of the genre.
+            since = await cls._cache_version(CATALOG_KEY, db)
+        genre_id = await cls._genre_id(genre, db)
+        if fields is not None:
+            if genre_id is None:
+                return []
+            result = await db.execute(
+                sparse_select(tuple(fields), "genre_id"), {"genre_id": genre_id}
+            )
+            return sparse_rows(result.all(), fields)
+        movies = []
+        if genre_id is not None:
+            result = await db.execute(MOVIES_BY_GENRE, {"genre_id": genre_id})
+            movies = [MovieSchema.model_validate(movie) for movie in result.scalars()]
+        await cls._cache_set(
+            genre_key(genre), [movie.model_dump() for movie in movies], since
+        )
         return movies
@@ -1,20 +1,18 @@
 from email_validator import EmailNotValidError, validate_email
-from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, load_only
 
 from app.models.user_role import User, UserCreate, Profile
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.security.passwords import password_hasher
 
 
 class UserService:
 
     @classmethod
     async def create_user(cls, session: AsyncSession, user: User) -> UserCreate | None:
-        hashed_password = pwd_context.hash(user.hashed_password)
+        hashed_password = await password_hasher.hash(user.hashed_password)
         user.hashed_password = hashed_password
         session.add(user)
         try:
@@ -30,7 +28,8 @@ class UserService:
         cls, session: AsyncSession, username_or_email: str
     ) -> User | None:
         try:
-            validate_email(username_or_email)
+            # Syntax only; the default deliverability check is a DNS lookup.
+            validate_email(username_or_email, check_deliverability=False)
             query_filter = User.email
         except EmailNotValidError:
             query_filter = User.username
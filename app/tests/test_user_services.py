@@ -130,6 +130,26 @@ async def test_get_user_with_options_with_options(mock_session):
     call_args = mock_session.execute.call_args[0][0]
     assert str(call_args) == str(select(User).options(option).where(User.id == user_id))
 
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "login, column",
+    [("test@example.com", User.email), ("testuser", User.username)],
+)
+async def test_find_by_username_or_email_skips_dns(mock_session, mocker, login, column):
+    deliverability = mocker.patch(
+        "email_validator.deliverability.validate_email_deliverability"
+    )
+    mock_execute_result = MagicMock()
+    mock_execute_result.scalar_one_or_none.return_value = None
+    mock_session.execute = AsyncMock(return_value=mock_execute_result)
+
+    await UserService.find_by_username_or_email(mock_session, login)
+
+    deliverability.assert_not_called()
+    call_args = mock_session.execute.call_args[0][0]
+    assert str(call_args) == str(select(User).where(column == login))
+
 # To run these tests, you would typically use a command like:
 # pytest app/tests/test_user_services.py
 # Ensure you have pytest and pytest-asyncio installed:
@@ -0,0 +1,148 @@
+"""Latency of typo-tolerant title lookups.
+
+Measures the in-process trigram index and, when BENCH_POSTGRES_URL points at a
+PostgreSQL database with pg_trgm available, the pg_trgm path as well. The
+PostgreSQL run drops and recreates the movies table.
+
+    python -m benchmarks.bench_fuzzy_search --titles 1000000
+    BENCH_POSTGRES_URL=postgresql+asyncpg://... python -m benchmarks.bench_fuzzy_search
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.trigram import TrigramIndex
+from app.db.database import Base
+from app.models.movie import Genre, Movie
+from app.services.movies_services import MovieService
+
+LOOKUPS = 200
+# English letter frequencies, so pseudo-words have a realistic trigram spread.
+LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+LETTER_WEIGHTS = [
+    12.7,
+    9.1,
+    8.2,
+    7.5,
+    7.0,
+    6.7,
+    6.3,
+    6.1,
+    6.0,
+    4.3,
+    4.0,
+    2.8,
+    2.8,
+    2.4,
+    2.4,
+    2.2,
+    2.0,
+    2.0,
+    1.9,
+    1.5,
+    1.0,
+    0.8,
+    0.2,
+    0.2,
+    0.1,
+    0.1,
+]
+
+
+def make_titles(count: int, seed: int = 7) -> list[str]:
+    """Titles of one to four words drawn from a 50k pseudo-word vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choices(LETTERS, LETTER_WEIGHTS, k=rng.randint(3, 9)))
+        for _ in range(50_000)
+    ]
+    return [
+        " ".join(rng.choices(vocabulary, k=rng.randint(1, 4))).title()
+        for _ in range(count)
+    ]
+
+
+def misspell(title: str, rng: random.Random) -> str:
+    words = title.split()
+    word = rng.choice(words)
+    position = rng.randrange(len(word))
+    typo = word[:position] + word[position + 1 :]
+    return " ".join(typo if candidate == word else candidate for candidate in words)
+
+
+def report(name: str, latencies_ms: list[float]) -> None:
+    cuts = statistics.quantiles(latencies_ms, n=100)
+    print(f"{name:<30} p50 {cuts[49]:8.3f} ms  p99 {cuts[98]:8.3f} ms")
+
+
+def bench_index(titles: list[str], queries: list[str]) -> None:
+    index = TrigramIndex()
+    start = time.perf_counter()
+    index.rebuild(enumerate(titles, start=1))
+    print(f"built index of {len(index)} titles in {time.perf_counter() - start:.1f} s")
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    report("in-process trigram index", latencies)
+
+
+async def bench_postgres(url: str, titles: list[str], queries: list[str]) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        tables = [Genre.__table__, Movie.__table__]
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+        for start in range(0, len(titles), 10_000):
+            await conn.execute(
+                insert(Movie),
+                [
+                    {
+                        "title": title,
+                        "director": "D",
+                        "release_year": 2000,
+                    }
+                    for title in titles[start : start + 10_000]
+                ],
+            )
+        await conn.execute(text("ANALYZE movies"))
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    latencies = []
+    async with session_factory() as session:
+        for query in queries:
+            start = time.perf_counter()
+            await MovieService.fuzzy_search_movies(query, session, limit=20)
+            latencies.append((time.perf_counter() - start) * 1000)
+    await engine.dispose()
+    report("pg_trgm (similarity + GIN)", latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=200_000)
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles)
+    rng = random.Random(11)
+    queries = [misspell(rng.choice(titles), rng) for _ in range(LOOKUPS)]
+
+    bench_index(titles, queries)
+    url = os.getenv("BENCH_POSTGRES_URL")
+    if url:
+        asyncio.run(bench_postgres(url, titles, queries))
+    else:
+        print("pg_trgm path skipped: set BENCH_POSTGRES_URL to run it")
+
+
+if __name__ == "__main__":
+    main()
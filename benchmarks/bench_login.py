@@ -0,0 +1,142 @@
+"""Latency of POST /v1/security/token by username and by email.
+
+Compares telling emails from usernames with email_validator's default
+deliverability check, a DNS lookup, with the syntax-only check now used by
+UserService. bcrypt runs at its minimum cost so that the resolution step is
+not drowned out.
+
+The deliverability check answers from a stand-in resolver that takes
+--resolver-ms per lookup, so that both paths authenticate offline too;
+--live-dns uses the system resolver instead, where an unreachable resolver
+rejects every email login.
+
+    python -m benchmarks.bench_login [--logins 200] [--resolver-ms 20] [--live-dns]
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from email_validator import EmailNotValidError, validate_email
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.models.user_role import User, UserRole
+from app.security.passwords import password_hasher
+from app.services.user_services import UserService
+from benchmarks.common import (
+    RoundTripCounter,
+    api_client,
+    create_database,
+    summarize,
+    timed,
+)
+
+PASSWORD = "benchmark"
+
+
+async def legacy_find_by_username_or_email(session, username_or_email):
+    try:
+        validate_email(username_or_email)
+        query_filter = User.email
+    except EmailNotValidError:
+        query_filter = User.username
+    result = await session.execute(
+        select(User).where(query_filter == username_or_email)
+    )
+    return result.scalar_one_or_none()
+
+
+def resolver(latency_ms: float):
+    """Stands in for email_validator's DNS lookup, answering with an MX record
+    after ``latency_ms``. Blocks like the real lookup does."""
+
+    def validate_email_deliverability(
+        domain, domain_i18n, timeout=None, dns_resolver=None
+    ):
+        time.sleep(latency_ms / 1000)
+        return {"mx": [(10, f"mx.{domain}")], "mx_fallback_type": None}
+
+    return patch(
+        "email_validator.deliverability.validate_email_deliverability",
+        validate_email_deliverability,
+    )
+
+
+async def seed(session_factory):
+    async with session_factory() as session:
+        session.add(
+            User(
+                username="benchmark",
+                email="benchmark@example.com",
+                hashed_password=password_hasher.context.hash(PASSWORD),
+                role=UserRole.basic,
+            )
+        )
+        await session.commit()
+
+
+async def run(client, counter, login: str, logins: int):
+    latencies, round_trips, failures = [], [], 0
+    for _ in range(logins):
+        with counter.measure() as sample:
+            response, elapsed = await timed(
+                lambda: client.post(
+                    "/v1/security/token",
+                    data={"username": login, "password": PASSWORD},
+                )
+            )
+        # With --live-dns and no working resolver, the deliverability check
+        # rejects every email, which then fails to match as a username.
+        failures += response.status_code != 200
+        latencies.append(elapsed)
+        round_trips.append(sample["round_trips"])
+    return latencies, round_trips, failures
+
+
+async def main(logins: int, resolver_ms: float, live_dns: bool):
+    engine, session_factory = await create_database()
+    counter = RoundTripCounter(engine)
+    with patch.object(
+        password_hasher,
+        "context",
+        CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto"),
+    ):
+        await seed(session_factory)
+        for name, legacy in [("deliverability", True), ("syntax only", False)]:
+            with ExitStack() as stack:
+                if legacy:
+                    if not live_dns:
+                        stack.enter_context(resolver(resolver_ms))
+                    stack.enter_context(
+                        patch.object(
+                            UserService,
+                            "find_by_username_or_email",
+                            legacy_find_by_username_or_email,
+                        )
+                    )
+                client = stack.enter_context(api_client(session_factory))
+                for kind, login in [
+                    ("username", "benchmark"),
+                    ("email", "benchmark@example.com"),
+                ]:
+                    await run(client, counter, login, 5)  # warm up
+                    latencies, round_trips, failures = await run(
+                        client, counter, login, logins
+                    )
+                    print(
+                        summarize(f"{name} ({kind})", latencies, round_trips)
+                        + f"  failed {failures}/{logins}"
+                    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--resolver-ms", type=float, default=20)
+    parser.add_argument("--live-dns", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.resolver_ms, args.live_dns))
@@ -0,0 +1,94 @@
+"""Latency of GET /v1/movies/ pages with and without fast_movie_responses.
+
+The default path loads ORM rows, validates each through MovieSchema and
+encodes the result with the response model; the fast path renders dicts built
+from the selected row tuples once with orjson.
+
+    python -m benchmarks.bench_movie_list [--movies 20000] [--limit 500]
+"""
+
+import argparse
+import asyncio
+from unittest.mock import patch
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.models.movie import Genre, Movie
+from benchmarks.common import (
+    RoundTripCounter,
+    api_client,
+    create_database,
+    summarize,
+    timed,
+)
+
+REQUESTS = 200
+GENRES = ["Drama", "Comedy", "Horror", "Action", "Documentary"]
+
+
+async def seed(session_factory, movies: int):
+    async with session_factory() as session:
+        await session.execute(
+            insert(Genre),
+            [
+                {"id": index, "name": genre.casefold(), "label": genre}
+                for index, genre in enumerate(GENRES, 1)
+            ],
+        )
+        await session.execute(
+            insert(Movie),
+            [
+                {
+                    "title": f"Movie {index}",
+                    "genre_id": index % len(GENRES) + 1,
+                    "director": f"Director {index % 500}",
+                    "release_year": 1950 + index % 75,
+                }
+                for index in range(movies)
+            ],
+        )
+        await session.commit()
+
+
+async def run(client, counter, limit: int):
+    latencies, round_trips = [], []
+    cursor = None
+    for _ in range(REQUESTS):
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        with counter.measure() as sample:
+            response, elapsed = await timed(
+                lambda: client.get("/v1/movies/", params=params)
+            )
+        assert response.status_code == 200, response.text
+        # Page through the catalog, starting over at its end.
+        cursor = response.json()["next_cursor"]
+        latencies.append(elapsed)
+        round_trips.append(sample["round_trips"])
+    return latencies, round_trips
+
+
+async def main(movies: int, limit: int):
+    engine, session_factory = await create_database()
+    counter = RoundTripCounter(engine)
+    await seed(session_factory, movies)
+    with api_client(session_factory) as client:
+        for name, fast in [("response_model", False), ("fast path", True)]:
+            with patch.object(settings, "fast_movie_responses", fast):
+                await run(client, counter, limit)  # warm up
+                print(
+                    summarize(
+                        f"{name} ({limit}/page)", *await run(client, counter, limit)
+                    )
+                )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.movies, args.limit))
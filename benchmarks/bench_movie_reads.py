@@ -0,0 +1,105 @@
+"""Per-query Python overhead of the MovieService point and genre reads.
+
+Compares building the select for every call, as MovieService used to, with
+executing the prebuilt statements it uses now. In-memory SQLite keeps the
+database's share of each query small, so the gap is statement construction
+and compilation-cache lookup.
+
+    python -m benchmarks.bench_movie_reads [--movies 20000] [--queries 5000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import insert, select
+
+from app.models.movie import Genre, Movie
+from app.services.movies_services import MOVIE_BY_ID, MOVIES_BY_GENRE
+from benchmarks.common import create_database
+
+GENRES = 200
+
+
+async def seed(session_factory, movies: int):
+    async with session_factory() as session:
+        await session.execute(
+            insert(Genre),
+            [
+                {"id": index, "name": f"genre {index}", "label": f"Genre {index}"}
+                for index in range(1, GENRES + 1)
+            ],
+        )
+        await session.execute(
+            insert(Movie),
+            [
+                {
+                    "title": f"Movie {index}",
+                    "genre_id": index % GENRES + 1,
+                    "director": f"Director {index % 500}",
+                    "release_year": 1950 + index % 75,
+                }
+                for index in range(movies)
+            ],
+        )
+        await session.commit()
+
+
+async def run(session, execute, keys):
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        result = await execute(key)
+        result.scalars().all()
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+        # Keep the identity map from turning repeats into cheaper lookups.
+        session.expunge_all()
+    return latencies
+
+
+def report(name: str, latencies_us: list[float]) -> str:
+    cuts = statistics.quantiles(latencies_us, n=100)
+    return f"{name:<28} p50 {cuts[49]:7.1f} us  p99 {cuts[98]:7.1f} us"
+
+
+async def main(movies: int, queries: int):
+    engine, session_factory = await create_database()
+    await seed(session_factory, movies)
+    ids = [index % movies + 1 for index in range(0, queries * 7, 7)]
+    genre_ids = [index % GENRES + 1 for index in range(queries)]
+    async with session_factory() as session:
+        cases = [
+            (
+                "by id, per-call select",
+                lambda key: session.execute(select(Movie).where(Movie.id == key)),
+                ids,
+            ),
+            (
+                "by id, prebuilt",
+                lambda key: session.execute(MOVIE_BY_ID, {"id": key}),
+                ids,
+            ),
+            (
+                "by genre, per-call select",
+                lambda key: session.execute(select(Movie).where(Movie.genre_id == key)),
+                genre_ids,
+            ),
+            (
+                "by genre, prebuilt",
+                lambda key: session.execute(MOVIES_BY_GENRE, {"genre_id": key}),
+                genre_ids,
+            ),
+        ]
+        for name, execute, keys in cases:
+            await run(session, execute, keys[:200])  # warm up
+            print(report(name, await run(session, execute, keys)))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.movies, args.queries))
@@ -0,0 +1,142 @@
+"""Round trips and latency of PUT/DELETE /v1/movies/{id}.
+
+Compares the RETURNING-based write path of MovieService with the previous
+select / mutate / commit / refresh sequence, which kept no facet counts.
+
+The round trips saved show on PostgreSQL, where the facet counts and the
+replaced values of an update are CTEs of the write: PUT takes 2 instead of
+4 and DELETE 2 instead of 3. On SQLite, which has no writable CTEs, the
+facet counts take a statement of their own, as does reading the replaced
+values of an update: PUT takes 3 and DELETE stays at 3, spending the round
+trip RETURNING saves on the facet counts the legacy path never kept. Run
+against PostgreSQL with BENCH_POSTGRES_URL; that run drops and recreates
+the tables.
+
+    python -m benchmarks.bench_movie_writes
+    BENCH_POSTGRES_URL=postgresql+asyncpg://... python -m benchmarks.bench_movie_writes
+"""
+
+import asyncio
+import os
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from sqlalchemy import select
+
+from app.core.exceptions import MovieNotFoundException
+from app.models.movie import Genre, Movie
+from app.services.movies_services import MovieService
+from benchmarks.common import (
+    DATABASE_URL,
+    RoundTripCounter,
+    api_client,
+    create_database,
+    summarize,
+    timed,
+)
+
+OPERATIONS = 500
+
+
+async def legacy_update_movie(movie_id, updated_movie, db):
+    result = await db.execute(select(Movie).where(Movie.id == movie_id))
+    movie = result.scalar_one_or_none()
+    if movie is None:
+        raise MovieNotFoundException(movie_id)
+    movie.title = updated_movie.title
+    movie.director = updated_movie.director
+    movie.release_year = updated_movie.release_year
+    await db.commit()
+    await db.refresh(movie)
+    return movie
+
+
+async def legacy_delete_movie(movie_id, db):
+    result = await db.execute(select(Movie).where(Movie.id == movie_id))
+    movie = result.scalar_one_or_none()
+    if movie is not None:
+        await db.delete(movie)
+        await db.commit()
+    return movie
+
+
+async def seed(session_factory):
+    async with session_factory() as session:
+        session.add(Genre(id=1, name="drama", label="Drama"))
+        session.add_all(
+            Movie(
+                title=f"Movie {index}",
+                genre_id=1,
+                director="Director",
+                release_year=2000,
+            )
+            for index in range(OPERATIONS)
+        )
+        await session.commit()
+        await MovieService._load_genres(session)
+
+
+async def run(client, counter, method, path_for, body_for=None):
+    latencies, round_trips = [], []
+    for index in range(1, OPERATIONS + 1):
+        kwargs = {"json": body_for(index)} if body_for else {}
+        with counter.measure() as sample:
+            response, elapsed = await timed(
+                lambda: client.request(method, path_for(index), **kwargs)
+            )
+        assert response.status_code == 200, response.text
+        latencies.append(elapsed)
+        round_trips.append(sample["round_trips"])
+    return latencies, round_trips
+
+
+def update_body(index):
+    return {
+        "id": index,
+        "title": f"Updated {index}",
+        "genre": "Drama",
+        "director": "Director",
+        "release_year": 2001,
+    }
+
+
+def movie_path(index):
+    return f"/v1/movies/{index}"
+
+
+async def bench(name, legacy, url):
+    engine, session_factory = await create_database(url)
+    counter = RoundTripCounter(engine)
+    await seed(session_factory)
+    with ExitStack() as stack:
+        if legacy:
+            stack.enter_context(
+                patch.object(MovieService, "update_movie", legacy_update_movie)
+            )
+            stack.enter_context(
+                patch.object(MovieService, "delete_movie", legacy_delete_movie)
+            )
+        client = stack.enter_context(api_client(session_factory))
+        put = await run(client, counter, "PUT", movie_path, update_body)
+        delete = await run(client, counter, "DELETE", movie_path)
+    await engine.dispose()
+    print(summarize(f"PUT    {name}", *put))
+    print(summarize(f"DELETE {name}", *delete))
+
+
+async def main():
+    await bench("select/commit/refresh", legacy=True, url=DATABASE_URL)
+    await bench("RETURNING", legacy=False, url=DATABASE_URL)
+    url = os.getenv("BENCH_POSTGRES_URL")
+    if url:
+        await bench("PostgreSQL select/commit/refresh", legacy=True, url=url)
+        await bench("PostgreSQL RETURNING", legacy=False, url=url)
+    else:
+        print(
+            "PostgreSQL run skipped: set BENCH_POSTGRES_URL to run it. On SQLite "
+            "the facet counts take the round trip RETURNING saves on DELETE."
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+import logging
+import statistics
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import StaticPool, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.profiler import ProfileEndpointsMiddleWare
+from app.db.database import Base, get_db, get_read_db
+from app.main import app
+from app.security.security import get_current_user
+
+DATABASE_URL = "sqlite+aiosqlite://"
+
+
+class RoundTripCounter:
+    """Counts statements and commits sent over the engine's connections."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def _on_commit(self, conn):
+        self.count += 1
+
+    @contextmanager
+    def measure(self):
+        start = self.count
+        sample = {}
+        yield sample
+        sample["round_trips"] = self.count - start
+
+
+async def create_database(url: str = DATABASE_URL):
+    """A database with the app's tables; other than the default in-memory
+    SQLite, the tables are dropped and recreated."""
+    if url == DATABASE_URL:
+        engine = create_async_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        if url != DATABASE_URL:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, class_=AsyncSession)
+
+
+@contextmanager
+def api_client(session_factory):
+    """An HTTP client against the app, with auth stubbed out and ``session_factory``
+    used for every request's database session."""
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    async def override_get_current_user():
+        return {"username": "benchmark"}
+
+    async def passthrough(self, request, call_next):
+        return await call_next(request)
+
+    overrides = {
+        get_db: override_get_db,
+        get_read_db: override_get_db,
+        get_current_user: override_get_current_user,
+    }
+    app.dependency_overrides.update(overrides)
+    # The app logs several lines per request, errors included, which would
+    # bury the results.
+    logging.disable(logging.ERROR)
+    try:
+        # Per-request profiling would dwarf whatever is being measured.
+        with patch.object(ProfileEndpointsMiddleWare, "dispatch", passthrough):
+            yield AsyncClient(transport=ASGITransport(app=app), base_url="http://bench")
+    finally:
+        logging.disable(logging.NOTSET)
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+
+
+async def timed(call):
+    start = time.perf_counter()
+    result = await call()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(name: str, latencies_ms: list[float], round_trips: list[int]) -> str:
+    cuts = statistics.quantiles(latencies_ms, n=100)
+    return (
+        f"{name:<28} round trips/op {statistics.mean(round_trips):5.2f}  "
+        f"p50 {cuts[49]:7.3f} ms  p99 {cuts[98]:7.3f} ms"
+    )
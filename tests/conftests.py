@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+
 import pytest
 import pytest_asyncio
 from fastapi import FastAPI
@@ -7,16 +9,35 @@ from sqlalchemy import StaticPool
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.api.profiler import ProfileEndpointsMiddleWare
-from app.db.database import Base, get_db
+from app.core.cache import build_movie_cache
+from app.core.config import settings
+from app.core.genres import genre_map
+from app.core.trigram import TrigramIndex
+from app.db.database import (
+    Base,
+    get_db,
+    get_read_db,
+    instrument_queries,
+    track_queries,
+)
 from app.main import app
 from app.middleware.webhook import WebhookSenderMiddleWare
 from app.models.user_role import User, UserRole
+from app.security import principals
+from app.services.movies_services import MovieService
 
 
 async def side_effect_profile_endpoint_middleware(request, call_next):
     return await call_next(request)
 
 
+@pytest.fixture(scope="function")
+def internal_headers(mocker):
+    """Headers that reach /internal/* and X-Profile, with a token configured."""
+    mocker.patch.object(settings, "internal_api_token", "internal-test-token")
+    return {"X-Internal-Token": "internal-test-token"}
+
+
 @pytest.fixture(scope="function")
 def common_mocks(mocker):
     mocker.patch(
@@ -35,6 +56,19 @@ engine = create_async_engine(
 )
 
 
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail if the block runs more than ``limit`` SQL statements, listing them."""
+    instrument_queries()
+    with track_queries() as stats:
+        yield stats
+    assert (
+        stats.count <= limit
+    ), f"{stats.count} queries, expected at most {limit}:\n" + "\n".join(
+        f"{count}x {sql}" for sql, count in stats.statements.items()
+    )
+
+
 async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -47,6 +81,10 @@ async def drop_models():
 
 @pytest_asyncio.fixture(scope="function", autouse=True)
 async def setup_db():
+    MovieService.cache = build_movie_cache()
+    MovieService.fuzzy_index = TrigramIndex()
+    genre_map.clear()
+    principals.principal_cache = principals.build_principal_cache()
     await init_models()
     yield
     await drop_models()
@@ -86,6 +124,7 @@ async def integration_test_client(test_db_session, mocker):
         transport=ASGITransport(app=app), base_url="http://testserver"
     ) as client:
         app.dependency_overrides[get_db] = lambda: test_db_session
+        app.dependency_overrides[get_read_db] = lambda: test_db_session
         yield client
 
 
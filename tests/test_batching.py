@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.core.batching import GroupCommit
+
+
+def recording_flush(batches):
+    async def flush(items):
+        batches.append(items)
+        return [
+            ValueError(item) if item.startswith("bad") else item.upper()
+            for item in items
+        ]
+
+    return flush
+
+
+@pytest.mark.asyncio
+async def test_items_within_the_window_share_one_flush():
+    batches = []
+    writes = GroupCommit(recording_flush(batches), window=0.01, max_items=100)
+
+    results = await asyncio.gather(*(writes.submit(item) for item in "abc"))
+
+    assert results == ["A", "B", "C"]
+    assert batches == [["a", "b", "c"]]
+    assert writes.stats.items == 3
+    assert writes.stats.batches == 1
+    assert len(writes) == 0
+
+
+@pytest.mark.asyncio
+async def test_a_full_batch_flushes_without_waiting_for_the_window():
+    batches = []
+    writes = GroupCommit(recording_flush(batches), window=60, max_items=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(writes.submit(item) for item in "abcd")), timeout=1
+    )
+
+    assert results == ["A", "B", "C", "D"]
+    assert batches == [["a", "b"], ["c", "d"]]
+
+
+@pytest.mark.asyncio
+async def test_item_errors_go_to_their_own_caller():
+    writes = GroupCommit(recording_flush([]), window=0.01, max_items=100)
+
+    results = await asyncio.gather(
+        writes.submit("good"), writes.submit("bad"), return_exceptions=True
+    )
+
+    assert results[0] == "GOOD"
+    assert isinstance(results[1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_a_failed_flush_fails_every_caller():
+    async def flush(items):
+        raise ConnectionError("database down")
+
+    writes = GroupCommit(flush, window=0.01, max_items=100)
+
+    results = await asyncio.gather(
+        *(writes.submit(item) for item in "ab"), return_exceptions=True
+    )
+
+    assert [type(result) for result in results] == [ConnectionError] * 2
+    assert writes.stats.failed_batches == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_writes_what_is_waiting():
+    batches = []
+    writes = GroupCommit(recording_flush(batches), window=60, max_items=100)
+    waiter = asyncio.create_task(writes.submit("a"))
+    await asyncio.sleep(0)
+
+    await writes.drain()
+
+    assert batches == [["a"]]
+    assert await waiter == "A"
@@ -0,0 +1,68 @@
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import (
+    LocalSharedClient,
+    LRUCache,
+    SharedCache,
+    build_movie_cache,
+)
+from app.core.config import settings
+
+
+@pytest.mark.asyncio
+async def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+    assert cache.stats.evictions == 1
+    assert cache.stats.hits == 3
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_cache_expires_entries(mocker):
+    clock = mocker.patch("app.core.cache.time.monotonic", return_value=100.0)
+    cache = LRUCache(max_entries=10, ttl_seconds=5)
+    await cache.set("a", {"id": 1})
+    clock.return_value = 104.0
+    assert await cache.get("a") == {"id": 1}
+    clock.return_value = 105.0
+    assert await cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_round_trips_json_through_client():
+    client = LocalSharedClient()
+    cache = SharedCache(client, ttl_seconds=30, prefix="test:")
+    await cache.set("movie:1", {"id": 1, "title": "Alien"})
+
+    assert await client.get("test:movie:1") == '{"id": 1, "title": "Alien"}'
+    assert await SharedCache(client, prefix="test:").get("movie:1") == {
+        "id": 1,
+        "title": "Alien",
+    }
+
+    await cache.delete("movie:1")
+    assert await cache.get("movie:1") is None
+    assert cache.stats.invalidations == 1
+    assert cache.stats.misses == 1
+
+
+def test_movie_cache_is_shared_with_a_redis_url(mocker):
+    assert isinstance(build_movie_cache(), LRUCache)
+
+    client = LocalSharedClient()
+    mocker.patch.object(settings, "redis_url", "redis://cache:6379/0")
+    mocker.patch.object(cache_module, "shared_client", return_value=client)
+    cache = build_movie_cache()
+    assert isinstance(cache, SharedCache)
+    assert cache.client is client
@@ -0,0 +1,154 @@
+import uuid
+
+import pytest
+from fastapi import status
+
+from app.core.idempotency import (
+    DatabaseIdempotencyStore,
+    LocalIdempotencyStore,
+    StoredResponse,
+)
+from app.main import app
+from app.security.security import get_current_user
+from app.services.movies_services import MovieService
+from tests.conftests import (
+    TestingSessionLocal,
+    integration_test_client,
+    setup_db,
+    test_db_session,
+)
+from tests.test_movies_integration import get_token
+
+MOVIE = {
+    "title": "Alien",
+    "genre": "Horror",
+    "director": "Ridley Scott",
+    "release_year": 1979,
+}
+
+
+def stored(fingerprint="f", body=b'{"id": 1}'):
+    return StoredResponse(
+        fingerprint, 200, [("content-type", "application/json")], body
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_store_keeps_the_first_response():
+    store = LocalIdempotencyStore(ttl_seconds=60)
+    await store.put("key", stored(body=b"first"))
+    await store.put("key", stored(body=b"second"))
+
+    assert (await store.get("key")).body == b"first"
+    assert await store.get("other") is None
+
+
+@pytest.mark.asyncio
+async def test_local_store_expires_entries():
+    store = LocalIdempotencyStore(ttl_seconds=0)
+    await store.put("key", stored())
+
+    assert await store.get("key") is None
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_database_store_round_trip(setup_db):
+    store = DatabaseIdempotencyStore(TestingSessionLocal, ttl_seconds=60)
+    await store.put("key", stored(body=b"first"))
+    await store.put("key", stored(body=b"second"))
+
+    assert await store.get("key") == stored(body=b"first")
+    assert await store.get("other") is None
+
+
+@pytest.mark.asyncio
+async def test_database_store_ignores_expired_rows(setup_db):
+    store = DatabaseIdempotencyStore(TestingSessionLocal, ttl_seconds=0)
+    await store.put("key", stored())
+
+    assert await store.get("key") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_retried_create_replays_the_first_response(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    token = await get_token(integration_test_client)
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": str(uuid.uuid4())}
+    create = mocker.spy(MovieService, "create_movie")
+
+    first = await integration_test_client.post(
+        "/v1/movies/", json=MOVIE, headers=headers
+    )
+    retry = await integration_test_client.post(
+        "/v1/movies/", json=MOVIE, headers=headers
+    )
+
+    assert first.status_code == status.HTTP_200_OK
+    assert retry.status_code == status.HTTP_200_OK
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert create.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_idempotency_key_reused_for_another_request_is_rejected(
+    integration_test_client, test_db_session, setup_db
+):
+    token = await get_token(integration_test_client)
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": str(uuid.uuid4())}
+    await integration_test_client.post("/v1/movies/", json=MOVIE, headers=headers)
+
+    response = await integration_test_client.post(
+        "/v1/movies/", json={**MOVIE, "title": "Aliens"}, headers=headers
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_retried_delete_replays_instead_of_404(
+    integration_test_client, test_db_session, setup_db
+):
+    auth = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    created = await integration_test_client.post(
+        "/v1/movies/", json=MOVIE, headers=auth
+    )
+    path = f"/v1/movies/{created.json()['id']}"
+    headers = {**auth, "Idempotency-Key": str(uuid.uuid4())}
+
+    first = await integration_test_client.delete(path, headers=headers)
+    retry = await integration_test_client.delete(path, headers=headers)
+    without_key = await integration_test_client.delete(path, headers=auth)
+
+    assert first.status_code == retry.status_code == status.HTTP_200_OK
+    assert retry.json() == {"message": "Movie deleted successfully"}
+    assert without_key.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_unauthorized_writes_are_not_stored(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    # Other test modules stub authentication out for the whole session.
+    mocker.patch.dict(app.dependency_overrides)
+    app.dependency_overrides.pop(get_current_user, None)
+    key = str(uuid.uuid4())
+    rejected = await integration_test_client.post(
+        "/v1/movies/", json=MOVIE, headers={"Idempotency-Key": key}
+    )
+    token = await get_token(integration_test_client)
+    created = await integration_test_client.post(
+        "/v1/movies/",
+        json=MOVIE,
+        headers={"Authorization": f"Bearer {token}", "Idempotency-Key": key},
+    )
+
+    assert rejected.status_code == status.HTTP_401_UNAUTHORIZED
+    assert created.status_code == status.HTTP_200_OK
@@ -0,0 +1,57 @@
+from sqlalchemy import create_engine, text
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from app.db.database import Base
+from app.db.migrations import SCRIPT_LOCATION, stamp_if_unversioned
+from app.main import app  # noqa: F401  (registers every model)
+
+
+def test_schema_built_by_create_all_is_stamped_at_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    head = ScriptDirectory(str(SCRIPT_LOCATION)).get_current_head()
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        assert stamp_if_unversioned(connection, Base.metadata) == head
+        # Already versioned.
+        assert stamp_if_unversioned(connection, Base.metadata) is None
+        version = connection.execute(text("SELECT version_num FROM alembic_version"))
+        assert version.scalar() == head
+
+
+def test_incomplete_schema_is_left_to_the_migrations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE movies (id INTEGER PRIMARY KEY)"))
+        assert stamp_if_unversioned(connection, Base.metadata) is None
+
+
+def test_repeated_titles_are_renamed_not_dropped(tmp_path):
+    config = Config()
+    config.set_main_option("script_location", str(SCRIPT_LOCATION))
+    config.set_main_option(
+        "sqlalchemy.url", f"sqlite+aiosqlite:///{tmp_path / 'movies.db'}"
+    )
+    command.upgrade(config, "0e6f3b8a2c41")
+    engine = create_engine(f"sqlite:///{tmp_path / 'movies.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO movies (id, title) VALUES "
+                "(1, 'Heat'), (2, 'Heat'), (3, 'Up'), (4, NULL), (5, NULL), "
+                "(6, 'Heat')"
+            )
+        )
+
+    command.upgrade(config, "3b1f6c2d9a40")
+    with engine.connect() as connection:
+        titles = connection.execute(text("SELECT id, title FROM movies ORDER BY id"))
+        assert titles.all() == [
+            (1, "Heat"),
+            (2, "Heat (2)"),
+            (3, "Up"),
+            (4, None),
+            (5, None),
+            (6, "Heat (6)"),
+        ]
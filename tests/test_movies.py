@@ -80,9 +80,9 @@ class TestMoviesAPI(unittest.IsolatedAsyncioTestCase):
         side_effect=side_effect_profile_endpoint_middleware,
     )
     @patch(
-        "app.api.v1.movies.MovieService.get_all_movies",
+        "app.api.v1.movies.MovieService.get_movies_page",
         new_callable=AsyncMock,
-        return_value=[Movie(**payload) for payload in payloads],
+        return_value=([Movie(**payload) for payload in payloads], "next"),
     )
     @patch(
         "app.security.security.decode_access_token",
@@ -90,13 +90,14 @@ class TestMoviesAPI(unittest.IsolatedAsyncioTestCase):
         return_value={"user_id": 1},
     )
     async def test_get_movies(
-        self, mock_get_all_movies, decode_access_token, mock_dispatch
+        self, mock_get_movies_page, decode_access_token, mock_dispatch
     ):
         response = await self.client.get(
             "/v1/movies/", headers={"Authorization": f"Bearer valid_token"}
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.json(), list)
+        self.assertIsInstance(response.json()["items"], list)
+        self.assertEqual(response.json()["next_cursor"], "next")
 
     @patch.object(
         ProfileEndpointsMiddleWare,
@@ -184,37 +184,42 @@ async def test_get_all_movies_success(mocker, common_mocks, test_client):
             release_year=2021,
         ),
     ]
-    mocker.patch.object(MovieService, "get_all_movies", return_value=mock_movies)
+    mocker.patch.object(
+        MovieService, "get_movies_page", return_value=(mock_movies, None)
+    )
     response = await test_client.get(
         "/v1/movies/", headers=get_auth_headers("valid_token")
     )
     assert response.status_code == 200
-    assert response.json() == [
-        {
-            "id": 1,
-            "title": "Test Movie 1",
-            "genre": "Horror",
-            "director": "Test Director",
-            "release_year": 2021,
-        },
-        {
-            "id": 2,
-            "title": "Test Movie 2",
-            "genre": "Comedy",
-            "director": "Test Director",
-            "release_year": 2021,
-        },
-    ]
+    assert response.json() == {
+        "items": [
+            {
+                "id": 1,
+                "title": "Test Movie 1",
+                "genre": "Horror",
+                "director": "Test Director",
+                "release_year": 2021,
+            },
+            {
+                "id": 2,
+                "title": "Test Movie 2",
+                "genre": "Comedy",
+                "director": "Test Director",
+                "release_year": 2021,
+            },
+        ],
+        "next_cursor": None,
+    }
 
 
 @pytest.mark.asyncio
 async def test_get_all_movies_empty(mocker, common_mocks, test_client):
-    mocker.patch.object(MovieService, "get_all_movies", return_value=[])
+    mocker.patch.object(MovieService, "get_movies_page", return_value=([], None))
     response = await test_client.get(
         "/v1/movies/", headers=get_auth_headers("valid_token")
     )
     assert response.status_code == 200
-    assert response.json() == []
+    assert response.json() == {"items": [], "next_cursor": None}
 
 
 @pytest.mark.asyncio
@@ -1,7 +1,45 @@
+import asyncio
+import csv
+import io
+import json
+import threading
+from collections import Counter
+
 import pytest
 from fastapi import status
+from sqlalchemy import Insert, delete, event, select
 
-from tests.conftests import integration_test_client, setup_db, test_db_session
+from app.core.batching import GroupCommit
+from app.core.config import settings
+from app.core.exceptions import MovieAlreadyExistsException
+from app.core.genres import genre_map
+from app.core.pagination import encode_cursor
+from app.core.singleflight import SingleFlight
+from app.core.trigram import TrigramIndex
+from app.db.database import ReadRouter, get_read_db, read_router
+from app.main import app
+from app.models.movie import (
+    BulkItemStatus,
+    CreateMovie,
+    Genre,
+    Movie,
+    MovieSchema,
+    MovieSort,
+)
+from app.services.movies_services import (
+    MovieService,
+    facet_values,
+    genre_key,
+    movie_key,
+)
+from tests.conftests import (
+    TestingSessionLocal,
+    engine,
+    integration_test_client,
+    internal_headers,
+    setup_db,
+    test_db_session,
+)
 
 
 async def get_token(integration_test_client):
@@ -60,7 +98,139 @@ async def test_get_movies(integration_test_client, test_db_session, setup_db):
         headers={"Authorization": f"Bearer {await get_token(integration_test_client)}"},
     )
     assert response.status_code == status.HTTP_200_OK
-    assert isinstance(response.json(), list)
+    assert isinstance(response.json()["items"], list)
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_movies_paginated(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for index, year in enumerate([2003, 2001, 2002, 2001, 2004]):
+        await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": f"Movie {index}",
+                "genre": "Horror",
+                "director": "Test Director",
+                "release_year": year,
+            },
+            headers=headers,
+        )
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "sort": "release_year"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await integration_test_client.get(
+            "/v1/movies/", params=params, headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend((movie["release_year"], movie["id"]) for movie in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+    response = await integration_test_client.get(
+        "/v1/movies/", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for sort, values in [("id", [{"a": 1}]), ("title", [1, 2]), ("id", [True])]:
+        response = await integration_test_client.get(
+            "/v1/movies/",
+            params={"sort": sort, "cursor": encode_cursor(sort, values)},
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.parametrize("sort", [MovieSort.title, MovieSort.release_year_desc])
+async def test_movies_with_null_sort_values_are_paged(test_db_session, sort):
+    test_db_session.add_all(
+        [
+            Movie(title="Alien", release_year=1979),
+            Movie(title=None, release_year=None),
+            Movie(title="Brazil", release_year=1985),
+            Movie(title=None, release_year=None),
+        ]
+    )
+    await test_db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        movies, cursor = await MovieService.get_movies_page(
+            test_db_session, limit=1, cursor=cursor, sort=sort
+        )
+        seen.extend(movie.id for movie in movies)
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_movies_filtered(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    movies = [
+        ("Alien", "Horror", "Ridley Scott", 1979),
+        ("Aliens", "Action", "James Cameron", 1986),
+        ("The Thing", "Horror", "John Carpenter", 1982),
+        ("Prince of Darkness", "Horror", "John Carpenter", 1987),
+        ("The Fog", "Horror", "John Carpenter", 1980),
+    ]
+    for title, genre, director, release_year in movies:
+        await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": genre,
+                "director": director,
+                "release_year": release_year,
+            },
+            headers=headers,
+        )
+
+    async def titles(**params):
+        seen, cursor = [], None
+        while True:
+            page_params = {**params, "limit": 1}
+            if cursor:
+                page_params["cursor"] = cursor
+            response = await integration_test_client.get(
+                "/v1/movies/", params=page_params, headers=headers
+            )
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            seen.extend(movie["title"] for movie in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return seen
+
+    assert await titles(
+        genre="horror", year_from=1980, year_to=1986, sort="release_year"
+    ) == ["The Fog", "The Thing"]
+    assert await titles(director="John Carpenter", sort="title") == [
+        "Prince of Darkness",
+        "The Fog",
+        "The Thing",
+    ]
+    assert await titles(genre="Horror", sort="-id") == [
+        "The Fog",
+        "Prince of Darkness",
+        "The Thing",
+        "Alien",
+    ]
+    assert await titles(genre="Western") == []
 
 
 @pytest.mark.asyncio
@@ -169,3 +339,878 @@ async def test_delete_movie(integration_test_client, test_db_session, setup_db):
     )
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["message"] == "Movie deleted successfully"
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_export_movies(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    mocker.patch.object(read_router, "primary", TestingSessionLocal)
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for index in range(3):
+        await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": f"Movie, {index}",
+                "genre": "Horror",
+                "director": "Test Director",
+                "release_year": 2021,
+            },
+            headers=headers,
+        )
+
+    response = await integration_test_client.get(
+        "/v1/movies/export", params={"format": "ndjson"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Movie, 0", "Movie, 1", "Movie, 2"]
+
+    response = await integration_test_client.get(
+        "/v1/movies/export", params={"format": "csv"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "title", "genre", "director", "release_year"]
+    assert [row[1] for row in rows[1:]] == ["Movie, 0", "Movie, 1", "Movie, 2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_bulk_upsert_movies(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    await integration_test_client.post(
+        "/v1/movies/",
+        json={
+            "title": "Existing",
+            "genre": "Horror",
+            "director": "Old Director",
+            "release_year": 1999,
+        },
+        headers=headers,
+    )
+    payload = [
+        {
+            "title": title,
+            "genre": "Drama",
+            "director": "New Director",
+            "release_year": 2024,
+        }
+        for title in ["Existing", "Fresh", "Fresh"]
+    ]
+
+    response = await integration_test_client.post(
+        "/v1/movies/bulk", params={"on_conflict": "skip"}, json=payload, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["status"] for item in response.json()] == [
+        "skipped",
+        "created",
+        "skipped",
+    ]
+
+    response = await integration_test_client.post(
+        "/v1/movies/bulk", json=payload, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()
+    assert [item["status"] for item in results] == ["updated", "updated", "skipped"]
+    assert results[0]["movie"]["director"] == "New Director"
+    assert results[2]["movie"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_bulk_upsert_statuses_follow_concurrent_writes(test_db_session, mocker):
+    for title in ["Taken", "Deleted"]:
+        await MovieService.create_movie(
+            CreateMovie(title=title, genre="Horror", director="Old", release_year=1999),
+            test_db_session,
+        )
+    execute = test_db_session.execute
+    deleted = asyncio.Event()
+
+    async def read_then_delete(statement, *args, **kwargs):
+        result = await execute(statement, *args, **kwargs)
+        if isinstance(statement, Insert):
+            tables = [statement.table]
+        else:
+            tables = statement.get_final_froms()
+        if Movie.__table__ in tables and not deleted.is_set():
+            # Another client deletes a movie once the bulk upsert has first
+            # seen it, before the upsert locks or writes it.
+            deleted.set()
+            await execute(delete(Movie).where(Movie.title == "Deleted"))
+            await MovieService._apply_facet_deltas(
+                Counter({value: -1 for value in facet_values("Horror", "Old", 1999)}),
+                test_db_session,
+            )
+        return result
+
+    mocker.patch.object(test_db_session, "execute", side_effect=read_then_delete)
+    results = await MovieService.bulk_upsert_movies(
+        [
+            CreateMovie(title=title, genre="Drama", director="New", release_year=2024)
+            for title in ["Taken", "Deleted", "Fresh"]
+        ],
+        test_db_session,
+    )
+    mocker.stopall()
+
+    assert [(result["title"], result["status"]) for result in results] == [
+        ("Taken", BulkItemStatus.updated),
+        ("Deleted", BulkItemStatus.created),
+        ("Fresh", BulkItemStatus.created),
+    ]
+    facets = await MovieService.get_facets(test_db_session)
+    assert facets["genres"] == [{"value": "Drama", "count": 3}]
+    assert facets["directors"] == [{"value": "New", "count": 3}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_movie_title_conflicts(
+    integration_test_client, test_db_session, setup_db
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for title in ["First", "Second"]:
+        response = await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": "Horror",
+                "director": "Test Director",
+                "release_year": 2021,
+            },
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+    second_id = response.json()["id"]
+
+    response = await integration_test_client.post(
+        "/v1/movies/",
+        json={
+            "title": "First",
+            "genre": "Drama",
+            "director": "Other Director",
+            "release_year": 2022,
+        },
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Movie 'First' already exists."}
+
+    response = await integration_test_client.put(
+        f"/v1/movies/{second_id}",
+        json={
+            "id": second_id,
+            "title": "First",
+            "genre": "Horror",
+            "director": "Test Director",
+            "release_year": 2021,
+        },
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = await integration_test_client.delete(
+        f"/v1/movies/{second_id}", headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = await integration_test_client.delete(
+        f"/v1/movies/{second_id}", headers=headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_movie_reads_are_cached_and_invalidated(
+    integration_test_client, test_db_session, setup_db, internal_headers
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    response = await integration_test_client.post(
+        "/v1/movies/",
+        json={
+            "title": "Cached",
+            "genre": "Horror",
+            "director": "Test Director",
+            "release_year": 2021,
+        },
+        headers=headers,
+    )
+    movie_id = response.json()["id"]
+
+    for _ in range(2):
+        response = await integration_test_client.get(
+            f"/v1/movies/{movie_id}", headers=headers
+        )
+        assert response.json()["title"] == "Cached"
+        response = await integration_test_client.get(
+            "/v1/movies/genre/Horror", headers=headers
+        )
+        assert [movie["title"] for movie in response.json()] == ["Cached"]
+
+    stats = (
+        await integration_test_client.get("/internal/cache", headers=internal_headers)
+    ).json()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+    await integration_test_client.put(
+        f"/v1/movies/{movie_id}",
+        json={
+            "id": movie_id,
+            "title": "Renamed",
+            "genre": "Horror",
+            "director": "Test Director",
+            "release_year": 2021,
+        },
+        headers=headers,
+    )
+    response = await integration_test_client.get(
+        f"/v1/movies/{movie_id}", headers=headers
+    )
+    assert response.json()["title"] == "Renamed"
+    response = await integration_test_client.get(
+        "/v1/movies/genre/Horror", headers=headers
+    )
+    assert [movie["title"] for movie in response.json()] == ["Renamed"]
+
+    await integration_test_client.delete(f"/v1/movies/{movie_id}", headers=headers)
+    response = await integration_test_client.get(
+        f"/v1/movies/{movie_id}", headers=headers
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_reads_racing_a_write_are_not_cached(test_db_session, mocker):
+    movie = await MovieService.create_movie(
+        CreateMovie(
+            title="Before", genre="Horror", director="Someone", release_year=2001
+        ),
+        test_db_session,
+    )
+
+    async def read_racing_update(read, title):
+        """Run ``read`` on a session of its own, committing an update to the
+        movie right after the read's first SELECT, before it fills the cache."""
+        async with TestingSessionLocal() as reader:
+            execute = reader.execute
+
+            async def select_then_update(statement, *args, **kwargs):
+                result = await execute(statement, *args, **kwargs)
+                if reader_patch.call_count == 1:
+                    await MovieService.update_movie(
+                        movie.id,
+                        MovieSchema(
+                            id=movie.id,
+                            title=title,
+                            genre="Horror",
+                            director="Someone",
+                            release_year=2001,
+                        ),
+                        test_db_session,
+                    )
+                return result
+
+            reader_patch = mocker.patch.object(
+                reader, "execute", side_effect=select_then_update
+            )
+            return await read(reader)
+
+    await read_racing_update(
+        lambda reader: MovieService.get_movie_by_id(movie.id, reader), "After"
+    )
+    assert await MovieService.cache.get(movie_key(movie.id)) is None
+    fresh = await MovieService.get_movie_by_id(movie.id, test_db_session)
+    assert fresh.title == "After"
+
+    await read_racing_update(
+        lambda reader: MovieService.get_movies_by_genre("horror", reader), "Again"
+    )
+    assert await MovieService.cache.get(genre_key("horror")) is None
+    fresh = await MovieService.get_movies_by_genre("horror", test_db_session)
+    assert [movie.title for movie in fresh] == ["Again"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_replica_reads_skip_the_cache(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    response = await integration_test_client.post(
+        "/v1/movies/",
+        json={
+            "title": "Replicated",
+            "genre": "Horror",
+            "director": "Test Director",
+            "release_year": 2021,
+        },
+        headers=headers,
+    )
+    movie_id = response.json()["id"]
+
+    router = ReadRouter(TestingSessionLocal, [TestingSessionLocal])
+
+    async def replica_read_db():
+        async with await router.open_session(None) as session:
+            yield session
+
+    mocker.patch.dict(app.dependency_overrides, {get_read_db: replica_read_db})
+    for _ in range(2):
+        response = await integration_test_client.get(
+            f"/v1/movies/{movie_id}", headers=headers
+        )
+        assert response.json()["title"] == "Replicated"
+        # The version behind an ETag may be ahead of the replica's row.
+        assert "etag" not in response.headers
+
+    assert await MovieService.cache.get(movie_key(movie_id)) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_movie_reads_honor_if_none_match(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    payload = {
+        "title": "Tagged",
+        "genre": "Horror",
+        "director": "Test Director",
+        "release_year": 2021,
+    }
+    movie_id = (
+        await integration_test_client.post("/v1/movies/", json=payload, headers=headers)
+    ).json()["id"]
+
+    response = await integration_test_client.get(
+        f"/v1/movies/{movie_id}", headers=headers
+    )
+    movie_etag = response.headers["etag"]
+    response = await integration_test_client.get("/v1/movies/", headers=headers)
+    catalog_etag = response.headers["etag"]
+
+    get_movie_by_id = mocker.spy(MovieService, "get_movie_by_id")
+    response = await integration_test_client.get(
+        f"/v1/movies/{movie_id}", headers={**headers, "If-None-Match": movie_etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == movie_etag
+    get_movie_by_id.assert_not_called()
+    response = await integration_test_client.get(
+        "/v1/movies/", headers={**headers, "If-None-Match": catalog_etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    # Movies never written this epoch are looked up before a 304.
+    unwritten_etag = MovieService.versions.tag(0)
+    response = await integration_test_client.get(
+        "/v1/movies/9999", headers={**headers, "If-None-Match": unwritten_etag}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    await integration_test_client.put(
+        f"/v1/movies/{movie_id}",
+        json={"id": movie_id, **payload, "release_year": 2022},
+        headers=headers,
+    )
+    response = await integration_test_client.get(
+        f"/v1/movies/{movie_id}", headers={**headers, "If-None-Match": movie_etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != movie_etag
+    response = await integration_test_client.get(
+        "/v1/movies/", headers={**headers, "If-None-Match": catalog_etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    # Counters of one worker out of several cannot vouch for a 304.
+    mocker.patch.object(settings, "web_concurrency", 2)
+    etag = response.headers["etag"]
+    response = await integration_test_client.get(
+        "/v1/movies/", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "etag" not in response.headers
+    response = await integration_test_client.get(
+        f"/v1/movies/{movie_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "etag" not in response.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_search_movies(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    movie_ids = {}
+    for title, director in [
+        ("Alien", "Ridley Scott"),
+        ("Blade Runner", "Ridley Scott"),
+        ("Scott Pilgrim", "Edgar Wright"),
+        ("Heat", "Michael Mann"),
+    ]:
+        response = await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": "Drama",
+                "director": director,
+                "release_year": 2000,
+            },
+            headers=headers,
+        )
+        movie_ids[title] = response.json()["id"]
+
+    titles = []
+    cursor = None
+    while True:
+        params = {"q": "scott", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await integration_test_client.get(
+            "/v1/movies/search", params=params, headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        titles.extend(movie["title"] for movie in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(titles) == ["Alien", "Blade Runner", "Scott Pilgrim"]
+
+    await integration_test_client.put(
+        f"/v1/movies/{movie_ids['Alien']}",
+        json={
+            "id": movie_ids["Alien"],
+            "title": "Alien",
+            "genre": "Drama",
+            "director": "Nobody",
+            "release_year": 2000,
+        },
+        headers=headers,
+    )
+    response = await integration_test_client.get(
+        "/v1/movies/search", params={"q": "ridley scott"}, headers=headers
+    )
+    assert [movie["title"] for movie in response.json()["items"]] == ["Blade Runner"]
+
+    response = await integration_test_client.get(
+        "/v1/movies/search", params={"q": '"(*'}, headers=headers
+    )
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_fuzzy_search_movies(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for title in ["The Godfather", "The Godfather Part II", "Goodfellas"]:
+        await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": "Crime",
+                "director": "Someone",
+                "release_year": 1972,
+            },
+            headers=headers,
+        )
+
+    response = await integration_test_client.get(
+        "/v1/movies/search",
+        params={"q": "godfater", "fuzzy": "true", "limit": 1},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    assert [movie["title"] for movie in page["items"]] == ["The Godfather"]
+
+    response = await integration_test_client.get(
+        "/v1/movies/search",
+        params={
+            "q": "godfater",
+            "fuzzy": "true",
+            "limit": 1,
+            "cursor": page["next_cursor"],
+        },
+        headers=headers,
+    )
+    page = response.json()
+    assert [movie["title"] for movie in page["items"]] == ["The Godfather Part II"]
+    assert page["next_cursor"] is None
+
+    # Writes after the index is built are applied to it incrementally.
+    await integration_test_client.post(
+        "/v1/movies/",
+        json={
+            "title": "Godfather of Harlem",
+            "genre": "Crime",
+            "director": "Someone",
+            "release_year": 2019,
+        },
+        headers=headers,
+    )
+    response = await integration_test_client.get(
+        "/v1/movies/search",
+        params={"q": "godfather harlem", "fuzzy": "true"},
+        headers=headers,
+    )
+    assert response.json()["items"][0]["title"] == "Godfather of Harlem"
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_fuzzy_index_is_rebuilt_off_the_event_loop(test_db_session, mocker):
+    test_db_session.add(Movie(title="Alien", release_year=1979))
+    await test_db_session.commit()
+    old = TrigramIndex.build([(1, "Alien")])
+    old.built_at -= settings.fuzzy_index_max_age_seconds + 1
+    mocker.patch.object(MovieService, "fuzzy_index", old)
+    release = threading.Event()
+    build = TrigramIndex.build
+
+    def slow_build(titles):
+        release.wait(5)
+        return build(titles)
+
+    mocker.patch.object(TrigramIndex, "build", side_effect=slow_build)
+
+    rebuild = asyncio.create_task(MovieService._fuzzy_index(test_db_session))
+    while not MovieService._fuzzy_index_lock.locked():
+        await asyncio.sleep(0)
+    # Served meanwhile, and writes made meanwhile reach the new index too.
+    assert await MovieService._fuzzy_index(test_db_session) is old
+    MovieService._index_title(2, "Aliens")
+    release.set()
+    fresh = await rebuild
+
+    assert MovieService.fuzzy_index is fresh is not old
+    assert [movie_id for _, movie_id in fresh.search("alien")] == [1, 2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_movie_facets(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    movies = [
+        ("Alien", "Horror", "Ridley Scott", 1979),
+        ("Blade Runner", "Sci-Fi", "Ridley Scott", 1982),
+        ("The Thing", "Horror", "John Carpenter", 1982),
+        ("Halloween", "Horror", "John Carpenter", 1978),
+    ]
+    ids = {}
+    for title, genre, director, release_year in movies:
+        response = await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": genre,
+                "director": director,
+                "release_year": release_year,
+            },
+            headers=headers,
+        )
+        ids[title] = response.json()["id"]
+
+    await integration_test_client.put(
+        f"/v1/movies/{ids['Alien']}",
+        json={
+            "id": ids["Alien"],
+            "title": "Alien",
+            "genre": "Horror",
+            "director": "Someone Else",
+            "release_year": 1986,
+        },
+        headers=headers,
+    )
+    await integration_test_client.delete(
+        f"/v1/movies/{ids['Halloween']}", headers=headers
+    )
+    await integration_test_client.post(
+        "/v1/movies/bulk",
+        json=[
+            {
+                "title": "Blade Runner",
+                "genre": "Sci-Fi",
+                "director": "Ridley Scott",
+                "release_year": 1982,
+            },
+            {
+                "title": "Gladiator",
+                "genre": "Drama",
+                "director": "Ridley Scott",
+                "release_year": 2000,
+            },
+        ],
+        headers=headers,
+    )
+
+    response = await integration_test_client.get(
+        "/v1/movies/facets", params={"top_directors": 2}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "genres": [
+            {"value": "Horror", "count": 2},
+            {"value": "Drama", "count": 1},
+            {"value": "Sci-Fi", "count": 1},
+        ],
+        "decades": [
+            {"value": "1980s", "count": 3},
+            {"value": "2000s", "count": 1},
+        ],
+        "directors": [
+            {"value": "Ridley Scott", "count": 2},
+            {"value": "John Carpenter", "count": 1},
+        ],
+    }
+
+    etag = response.headers["ETag"]
+    response = await integration_test_client.get(
+        "/v1/movies/facets", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_genres_are_normalized(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for title, genre in [("Heat", "Crime"), ("Se7en", " crime"), ("Up", "Animation")]:
+        await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": genre,
+                "director": "Someone",
+                "release_year": 1995,
+            },
+            headers=headers,
+        )
+
+    # Genres match case-insensitively and keep the spelling they were first
+    # written with.
+    response = await integration_test_client.get(
+        "/v1/movies/genre/CRIME", headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [(movie["title"], movie["genre"]) for movie in response.json()] == [
+        ("Heat", "Crime"),
+        ("Se7en", "Crime"),
+    ]
+
+    # Another worker's process starts with an empty genre map.
+    genre_map.clear()
+    response = await integration_test_client.get("/v1/movies/", headers=headers)
+    assert [movie["genre"] for movie in response.json()["items"]] == [
+        "Crime",
+        "Crime",
+        "Animation",
+    ]
+
+    async with TestingSessionLocal() as session:
+        result = await session.execute(select(Genre.name).order_by(Genre.id))
+        assert result.scalars().all() == ["crime", "animation"]
+
+    # Unknown genres reload the genre table at most once per interval.
+    load_genres = mocker.spy(MovieService, "_load_genres")
+    genre_map.clear()
+    for genre in ("Western", "Musical", "western"):
+        response = await integration_test_client.get(
+            f"/v1/movies/genre/{genre}", headers=headers
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert load_genres.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_sparse_fieldsets(integration_test_client, test_db_session, setup_db):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for title in ["Alien", "Aliens"]:
+        response = await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": title,
+                "genre": "Horror",
+                "director": "Someone",
+                "release_year": 1979,
+            },
+            headers=headers,
+        )
+    movie_id = response.json()["id"]
+
+    response = await integration_test_client.get(
+        "/v1/movies/",
+        params={"fields": "id,title", "sort": "title", "limit": 1},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    assert page["items"] == [{"id": movie_id - 1, "title": "Alien"}]
+    assert "ETag" in response.headers
+    response = await integration_test_client.get(
+        "/v1/movies/",
+        params={
+            "fields": "title",
+            "sort": "title",
+            "limit": 1,
+            "cursor": page["next_cursor"],
+        },
+        headers=headers,
+    )
+    assert response.json() == {"items": [{"title": "Aliens"}], "next_cursor": None}
+
+    # Both an uncached and a cached movie are cut down to the fields.
+    for _ in range(2):
+        response = await integration_test_client.get(
+            f"/v1/movies/{movie_id}", params={"fields": "genre,title"}, headers=headers
+        )
+        assert response.json() == {"genre": "Horror", "title": "Aliens"}
+        await integration_test_client.get(f"/v1/movies/{movie_id}", headers=headers)
+
+    response = await integration_test_client.get(
+        "/v1/movies/genre/horror", params={"fields": "title"}, headers=headers
+    )
+    assert response.json() == [{"title": "Alien"}, {"title": "Aliens"}]
+
+    response = await integration_test_client.get(
+        "/v1/movies/", params={"fields": "id,budget"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Unknown or missing fields: budget."
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_fast_movie_responses_match_default(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    for index in range(3):
+        await integration_test_client.post(
+            "/v1/movies/",
+            json={
+                "title": f"Movie {index}",
+                "genre": "Drama",
+                "director": "Someone",
+                "release_year": 2000 + index,
+            },
+            headers=headers,
+        )
+    params = {"limit": 2, "sort": "-release_year"}
+    default = await integration_test_client.get(
+        "/v1/movies/", params=params, headers=headers
+    )
+
+    mocker.patch.object(settings, "fast_movie_responses", True)
+    fast = await integration_test_client.get(
+        "/v1/movies/", params=params, headers=headers
+    )
+    assert fast.status_code == status.HTTP_200_OK
+    assert fast.json() == default.json()
+    assert fast.headers["ETag"] == default.headers["ETag"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_concurrent_movie_reads_are_coalesced(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    response = await integration_test_client.post(
+        "/v1/movies/",
+        json={
+            "title": "Alien",
+            "genre": "Horror",
+            "director": "Ridley Scott",
+            "release_year": 1979,
+        },
+        headers=headers,
+    )
+    movie_id = response.json()["id"]
+    mocker.patch.object(MovieService, "cache", None)
+    mocker.patch.object(MovieService, "reads", SingleFlight())
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        sessions = [TestingSessionLocal() for _ in range(10)]
+        movies = await asyncio.gather(
+            *(MovieService.get_movie_by_id(movie_id, session) for session in sessions)
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+        for session in sessions:
+            await session.close()
+
+    assert {movie.title for movie in movies} == {"Alien"}
+    assert len(statements) == 1
+    assert MovieService.reads.stats.coalesced == 9
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_batched_creates_share_one_insert(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    mocker.patch.object(
+        MovieService,
+        "writes",
+        GroupCommit(
+            lambda movies: MovieService._create_batch(movies),
+            window=0.05,
+            max_items=100,
+        ),
+    )
+    mocker.patch.object(MovieService, "write_session", TestingSessionLocal)
+    movies = [
+        CreateMovie(
+            title=title, genre="Horror", director="Ridley Scott", release_year=1979
+        )
+        for title in ["Alien", "Aliens", "Alien"]
+    ]
+    inserts = []
+
+    def listener(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO movies"):
+            inserts.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        sessions = [TestingSessionLocal() for _ in movies]
+        results = await asyncio.gather(
+            *(
+                MovieService.create_movie(movie, session)
+                for movie, session in zip(movies, sessions)
+            ),
+            return_exceptions=True,
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+        for session in sessions:
+            await session.close()
+
+    assert [result.title for result in results[:2]] == ["Alien", "Aliens"]
+    assert results[0].id != results[1].id
+    assert isinstance(results[2], MovieAlreadyExistsException)
+    assert len(inserts) == 1
+    assert MovieService.writes.stats.batches == 1
+
+    response = await integration_test_client.get(
+        f"/v1/movies/{results[1].id}",
+        headers={"Authorization": f"Bearer {await get_token(integration_test_client)}"},
+    )
+    assert response.json()["title"] == "Aliens"
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.exceptions import PasswordHasherBusyException
+from app.security.passwords import PasswordHasher, password_hasher
+from tests.conftests import integration_test_client, setup_db, test_db_session
+
+
+def fast_hasher(**kwargs):
+    return PasswordHasher(
+        CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto"),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify():
+    hasher = fast_hasher()
+    hashed = await hasher.hash("hello")
+
+    assert await hasher.verify("hello", hashed)
+    assert not await hasher.verify("goodbye", hashed)
+    assert hasher.stats.completed == 3
+
+
+@pytest.mark.asyncio
+async def test_hashing_leaves_the_event_loop_free():
+    hasher = fast_hasher(workers=1)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    await hasher._run(time.sleep, 0.2)
+    ticker.cancel()
+
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_a_full_queue_rejects_new_hashes():
+    hasher = fast_hasher(workers=1, max_queued=1)
+    release = threading.Event()
+    running = asyncio.create_task(hasher._run(release.wait))
+    queued = asyncio.create_task(hasher._run(release.wait))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(PasswordHasherBusyException):
+        await hasher.hash("hello")
+    assert (hasher.stats.running, hasher.stats.queued) == (1, 1)
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert hasher.stats.rejected == 1
+    assert hasher.stats.completed == 2
+    assert hasher.stats.wait_seconds_max > 0
+
+
+def test_calibration_stays_within_the_budget():
+    hasher = fast_hasher()
+
+    assert hasher.calibrate(budget_seconds=0, min_rounds=5) == 5
+    rounds = hasher.calibrate(budget_seconds=0.05, min_rounds=4)
+    assert 4 <= rounds <= 16
+    assert hasher.context.to_dict()["bcrypt__rounds"] == rounds
+    start = time.perf_counter()
+    hasher.context.hash("hello")
+    assert time.perf_counter() - start < 0.2
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_busy_hasher_answers_503(
+    integration_test_client, test_db_session, setup_db, mocker
+):
+    mocker.patch.object(
+        password_hasher, "verify", side_effect=PasswordHasherBusyException()
+    )
+    response = await integration_test_client.post(
+        "/v1/security/token",
+        data={"username": "pandaind", "password": "hello"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
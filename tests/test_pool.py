@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, engine_options, pool_status
+from tests.conftests import (
+    integration_test_client,
+    internal_headers,
+    setup_db,
+    test_db_session,
+)
+
+
+@pytest.fixture
+def small_pool(mocker):
+    mocker.patch.multiple(
+        settings, db_pool_size=1, db_max_overflow=1, db_pool_timeout=0.05
+    )
+
+
+def test_engine_options_follow_settings(small_pool):
+    options = engine_options("postgresql+asyncpg://user:pw@db/movies")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 1
+    assert options["max_overflow"] == 1
+    assert options["pool_timeout"] == 0.05
+    assert options["connect_args"] == {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    }
+
+
+def test_in_memory_sqlite_keeps_its_pool():
+    options = engine_options("sqlite+aiosqlite:///:memory:")
+    assert "poolclass" not in options
+    assert "pool_size" not in options
+
+
+@pytest.mark.asyncio
+async def test_pool_status_counts_checkouts_and_timeouts(small_pool, tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    engine = create_async_engine(url, **engine_options(url))
+    try:
+        first = await engine.connect()
+        second = await engine.connect()
+        status = pool_status(engine)
+        assert status["checked_out"] == 2
+        assert status["overflow"] == 1
+        assert status["max_overflow"] == 1
+        assert engine.pool.recreate().max_overflow == 1
+
+        with pytest.raises(exc.TimeoutError):
+            await engine.connect()
+        await second.close()
+        await first.close()
+
+        status = pool_status(engine)
+        assert status["pool"] == "InstrumentedQueuePool"
+        assert status["checked_out"] == 0
+        assert status["idle"] == 1
+        assert status["checkouts"] == 2
+        assert status["checkout_timeouts"] == 1
+        assert status["wait_seconds_max"] >= 0.05
+        assert sum(status["wait_histogram_ms"].values()) == 3
+        assert status["wait_histogram_ms"]["le_100"] >= 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_endpoint(integration_test_client, internal_headers):
+    response = await integration_test_client.get(
+        "/internal/db/pool", headers=internal_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert "pool" in body["primary"]
+    assert body["replicas"] == []
@@ -0,0 +1,124 @@
+import pytest
+from sqlalchemy import event, select
+
+from app.core.config import settings
+from app.main import app
+from app.models.user_role import User, UserRole
+from app.security import principals
+from app.security.principals import PrincipalCache
+from app.security.security import get_current_user
+from tests.conftests import (
+    TestingSessionLocal,
+    engine,
+    integration_test_client,
+    setup_db,
+    test_db_session,
+)
+from tests.test_movies_integration import get_token
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self.statements
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+
+@pytest.fixture
+def real_auth(mocker):
+    # Other test modules stub authentication out for the whole session.
+    mocker.patch.dict(app.dependency_overrides)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def user_queries(statements):
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_entries_expire_with_the_token():
+    cache = PrincipalCache(ttl_seconds=60)
+    user = User(id=1, username="ann", email="ann@example.com", role=UserRole.basic)
+
+    cache.put("expired", user, token_expires_at=0)
+    cached = cache.put("valid", user, token_expires_at=2**40)
+
+    assert cache.get("expired") is None
+    assert cache.get("valid") is cached
+    assert cached is not user
+
+
+def test_invalidate_drops_every_token_of_the_user():
+    cache = PrincipalCache()
+    ann = User(id=1, username="ann", email="ann@example.com", role=UserRole.basic)
+    bob = User(id=2, username="bob", email="bob@example.com", role=UserRole.basic)
+    for signature, user in [("a1", ann), ("a2", ann), ("b1", bob)]:
+        cache.put(signature, user, token_expires_at=2**40)
+
+    cache.invalidate("ann")
+
+    assert cache.get("a1") is None
+    assert cache.get("a2") is None
+    assert cache.get("b1").username == "bob"
+    assert cache.stats.invalidations == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_authenticated_requests_reuse_the_resolved_user(
+    integration_test_client, test_db_session, setup_db, real_auth
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    await integration_test_client.get("/v1/security/users/me", headers=headers)
+
+    with StatementCounter() as statements:
+        response = await integration_test_client.get(
+            "/v1/security/users/me", headers=headers
+        )
+
+    assert response.json() == {"description": "pandaind authorized"}
+    assert user_queries(statements) == []
+    assert principals.principal_cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_role_change_invalidates_the_cached_user(
+    integration_test_client, test_db_session, setup_db, real_auth
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    await integration_test_client.get("/v1/security/users/me", headers=headers)
+    assert len(principals.principal_cache) == 1
+
+    async with TestingSessionLocal() as session:
+        user = (
+            await session.execute(select(User).where(User.username == "pandaind"))
+        ).scalar_one()
+        user.role = UserRole.premium
+        await session.commit()
+
+    assert len(principals.principal_cache) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_trusted_claims_need_no_user_query(
+    integration_test_client, test_db_session, setup_db, real_auth, mocker
+):
+    mocker.patch.object(settings, "auth_trust_token_claims", True)
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+
+    with StatementCounter() as statements:
+        response = await integration_test_client.get(
+            "/v1/security/users/me", headers=headers
+        )
+
+    assert response.json() == {"description": "pandaind authorized"}
+    assert user_queries(statements) == []
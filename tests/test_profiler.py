@@ -0,0 +1,197 @@
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pyinstrument import Profiler
+
+from app.api import profiler
+from app.api.profiler import (
+    ContinuousProfilerMiddleware,
+    FlameGraphFormat,
+    ProfileEndpointsMiddleWare,
+    ProfileWriter,
+    StackSampler,
+)
+from tests.conftests import internal_headers, test_client
+
+
+def profiled_app(sample_every=0):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id, "total": sum(range(10_000))}
+
+    app.add_middleware(ProfileEndpointsMiddleWare, sample_every=sample_every)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver")
+
+
+@pytest.fixture(autouse=True)
+def clear_profiles():
+    profiler.profiles.clear()
+    yield
+    profiler.profiles.clear()
+
+
+@pytest.mark.asyncio
+async def test_only_requests_asking_for_it_are_profiled(internal_headers):
+    async with profiled_app() as client:
+        await client.get("/items/1")
+        await client.get("/items/2", headers={"X-Profile": "1", **internal_headers})
+        # Without the internal token, asking is not enough.
+        await client.get("/items/3", headers={"X-Profile": "1"})
+        await client.get(
+            "/items/4", headers={"X-Profile": "1", "X-Internal-Token": "guess"}
+        )
+
+    recent = profiler.profiles.by_route()
+    assert list(recent) == ["/items/{item_id}"]
+    assert [profile["path"] for profile in recent["/items/{item_id}"]] == ["/items/2"]
+
+
+@pytest.mark.asyncio
+async def test_one_in_n_requests_is_sampled():
+    async with profiled_app(sample_every=2) as client:
+        for item_id in range(4):
+            await client.get(f"/items/{item_id}")
+
+    assert len(profiler.profiles.by_route()["/items/{item_id}"]) == 2
+
+
+def test_only_the_latest_profiles_per_route_are_kept():
+    store = profiler.ProfileStore(keep_per_route=2)
+    for index in range(3):
+        store.add("/items/{item_id}", "GET", f"/items/{index}", 0.0, session=None)
+
+    assert store.get(1) is None
+    assert store.get(3).path == "/items/2"
+
+
+@pytest.mark.asyncio
+async def test_writer_renders_profiles_in_the_background(tmp_path, internal_headers):
+    async with profiled_app() as client:
+        await client.get("/items/1", headers={"X-Profile": "1", **internal_headers})
+    (profile,) = profiler.profiles._routes["/items/{item_id}"]
+    writer = ProfileWriter(str(tmp_path))
+
+    writer.submit(profile)
+    writer.join()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        f"profile-{profile.id}.html",
+        f"profile-{profile.id}.speedscope.json",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_profiles_endpoint(test_client, internal_headers):
+    # test_client stubs the profiling middleware out, so profile directly.
+    request_profiler = Profiler(async_mode="enabled")
+    request_profiler.start()
+    sum(range(10_000))
+    session = request_profiler.stop()
+    profiler.profiles.add("/items/{item_id}", "GET", "/items/1", 0.0, session)
+
+    assert (await test_client.get("/internal/profiles")).status_code == 403
+    recent = (
+        await test_client.get("/internal/profiles", headers=internal_headers)
+    ).json()
+    (summary,) = recent["/items/{item_id}"]
+    speedscope = await test_client.get(
+        f"/internal/profiles/{summary['id']}",
+        params={"format": "speedscope"},
+        headers=internal_headers,
+    )
+    html = await test_client.get(
+        f"/internal/profiles/{summary['id']}", headers=internal_headers
+    )
+    missing = await test_client.get("/internal/profiles/0", headers=internal_headers)
+
+    assert speedscope.json()["$schema"].startswith("https://www.speedscope.app")
+    assert html.headers["content-type"].startswith("text/html")
+    assert missing.status_code == 404
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_continuous_samples_are_merged_by_route_template():
+    sampler = StackSampler(rate=500, window_seconds=60)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        spin(0.05)
+        return {"id": item_id}
+
+    app.add_middleware(ContinuousProfilerMiddleware, sampler=sampler)
+    sampler.start()
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://testserver"
+        ) as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+    finally:
+        sampler.stop()
+
+    assert list(sampler.routes()) == ["GET /items/{item_id}"]
+    assert "spin (" in sampler.render(FlameGraphFormat.collapsed)
+    assert sampler.requests == {}
+
+
+def test_samples_leave_the_rolling_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(profiler.time, "monotonic", lambda: now[0])
+    sampler = StackSampler(rate=10, window_seconds=10)
+    stack = (("read_item", "items.py", 1),)
+
+    sampler.record("GET /old", stack)
+    now[0] += 5
+    sampler.record("GET /new", stack, count=2)
+    assert sampler.routes() == {"GET /new": 2, "GET /old": 1}
+
+    now[0] += 6
+    assert sampler.routes() == {"GET /new": 2}
+
+
+@pytest.mark.asyncio
+async def test_flamegraph_endpoints(test_client, mocker, internal_headers):
+    response = await test_client.get("/internal/flamegraphs", headers=internal_headers)
+    assert response.json() == {"enabled": False}
+    sampler = StackSampler(rate=10, window_seconds=60)
+    mocker.patch.object(profiler, "stack_sampler", sampler)
+    outer, inner = ("get_movie", "movies.py", 10), ("fetch", "services.py", 20)
+    sampler.record("GET /v1/movies/{movie_id}", (outer, inner), count=3)
+    sampler.record("GET /v1/movies/", (outer,))
+
+    summary = (
+        await test_client.get("/internal/flamegraphs", headers=internal_headers)
+    ).json()
+    collapsed = await test_client.get(
+        "/internal/flamegraphs/export",
+        params={"route": "GET /v1/movies/{movie_id}"},
+        headers=internal_headers,
+    )
+    speedscope = await test_client.get(
+        "/internal/flamegraphs/export",
+        params={"format": "speedscope"},
+        headers=internal_headers,
+    )
+
+    assert summary["routes"] == {"GET /v1/movies/{movie_id}": 3, "GET /v1/movies/": 1}
+    assert collapsed.text == (
+        "GET /v1/movies/{movie_id};get_movie (movies.py:10);fetch (services.py:20) 3\n"
+    )
+    document = speedscope.json()
+    assert [frame["name"] for frame in document["shared"]["frames"]] == [
+        "get_movie",
+        "fetch",
+    ]
+    assert [profile["weights"] for profile in document["profiles"]] == [[0.1], [0.3]]
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.database import instrument_queries, track_queries
+from tests.conftests import (
+    TestingSessionLocal,
+    assert_max_queries,
+    integration_test_client,
+    setup_db,
+    test_db_session,
+)
+from tests.test_movies_integration import get_token
+
+MOVIE = {
+    "title": "Alien",
+    "genre": "Horror",
+    "director": "Ridley Scott",
+    "release_year": 1979,
+}
+
+
+@pytest.mark.asyncio
+async def test_nested_tracking_counts_towards_both(setup_db):
+    instrument_queries()
+    async with TestingSessionLocal() as session:
+        with track_queries() as outer:
+            await session.execute(text("SELECT 1"))
+            with track_queries() as inner:
+                await session.execute(text("SELECT 2"))
+                await session.execute(text("SELECT 2"))
+
+    assert (outer.count, inner.count) == (3, 2)
+    assert inner.duplicates == {"SELECT 2": 2}
+    assert outer.seconds >= inner.seconds > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_responses_report_database_time(
+    integration_test_client, test_db_session, setup_db
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    response = await integration_test_client.post(
+        "/v1/movies/", json=MOVIE, headers=headers
+    )
+
+    name, duration, description = response.headers["server-timing"].split(";")
+    assert name == "db"
+    assert float(duration.removeprefix("dur=")) > 0
+    assert description.endswith(' queries"')
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_movie_endpoints_stay_within_their_query_budgets(
+    integration_test_client, test_db_session, setup_db
+):
+    headers = {"Authorization": f"Bearer {await get_token(integration_test_client)}"}
+    with assert_max_queries(5):
+        response = await integration_test_client.post(
+            "/v1/movies/", json=MOVIE, headers=headers
+        )
+    movie_id = response.json()["id"]
+
+    with assert_max_queries(1):
+        await integration_test_client.get(f"/v1/movies/{movie_id}", headers=headers)
+    with assert_max_queries(1):
+        await integration_test_client.get("/v1/movies/", headers=headers)
+    with assert_max_queries(1):
+        await integration_test_client.get("/v1/movies/genre/Horror", headers=headers)
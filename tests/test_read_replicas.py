@@ -0,0 +1,153 @@
+import inspect
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+from app.db import database
+from app.db.database import (
+    ReadRouter,
+    client_key,
+    get_db,
+    get_read_db,
+    shares_reads,
+)
+from app.security.security import get_current_user
+
+
+def stand_in(path, name):
+    """A SQLite database standing in for one server, naming itself."""
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE server (name TEXT)")
+        conn.execute("INSERT INTO server VALUES (?)", (name,))
+    return async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{path}"), class_=AsyncSession
+    )
+
+
+def request_from(client):
+    return Request(
+        {
+            "type": "http",
+            "headers": [(b"authorization", client.encode())],
+            "client": ("127.0.0.1", 1234),
+        }
+    )
+
+
+async def served_by(router, client=None):
+    async with await router.open_session(client) as session:
+        return (await session.execute(text("SELECT name FROM server"))).scalar_one()
+
+
+@pytest.fixture
+def servers(tmp_path):
+    return {
+        name: stand_in(tmp_path / f"{name}.db", name)
+        for name in ["primary", "replica-1", "replica-2"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_reads_round_robin_over_replicas(servers):
+    router = ReadRouter(
+        servers["primary"], [servers["replica-1"], servers["replica-2"]]
+    )
+    assert [await served_by(router) for _ in range(4)] == [
+        "replica-1",
+        "replica-2",
+        "replica-1",
+        "replica-2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reads_use_the_primary_without_replicas(servers):
+    router = ReadRouter(servers["primary"])
+    assert await served_by(router) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back(servers, tmp_path):
+    broken = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/down.db"),
+        class_=AsyncSession,
+    )
+    router = ReadRouter(servers["primary"], [broken, servers["replica-2"]])
+    assert await served_by(router) == "replica-2"
+    # The broken replica is skipped from then on.
+    assert [await served_by(router) for _ in range(2)] == ["replica-2", "replica-2"]
+
+    router = ReadRouter(servers["primary"], [broken])
+    assert await served_by(router) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_sessions_connect_on_first_use(servers, tmp_path, mocker):
+    broken = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/down.db"),
+        class_=AsyncSession,
+    )
+    router = ReadRouter(servers["primary"], [broken])
+    mark_down = mocker.spy(router, "mark_down")
+    async with await router.open_session(None) as session:
+        # Reads that may come from a replica are neither cached nor shared.
+        assert not shares_reads(session)
+        assert mark_down.call_count == 0
+        await session.execute(text("SELECT name FROM server"))
+        assert mark_down.call_count == 1
+        assert session.info["replica"] is None
+
+    router = ReadRouter(servers["primary"])
+    async with await router.open_session(None) as session:
+        assert shares_reads(session)
+
+
+@pytest.mark.asyncio
+async def test_writes_pin_the_client_to_the_primary(servers, mocker):
+    router = ReadRouter(servers["primary"], [servers["replica-1"]], pin_seconds=60)
+    mocker.patch.object(database, "read_router", router)
+    mocker.patch.object(database, "async_session", servers["primary"])
+
+    writer = get_db(request_from("Bearer writer"))
+    session = await anext(writer)
+    await session.execute(text("INSERT INTO server VALUES ('written')"))
+    await session.commit()
+    await writer.aclose()
+
+    async def read_as(client):
+        reader = get_read_db(request_from(client))
+        session = await anext(reader)
+        name = (await session.execute(text("SELECT min(name) FROM server"))).scalar()
+        await reader.aclose()
+        return name
+
+    assert await read_as("Bearer writer") == "primary"
+    assert await read_as("Bearer someone else") == "replica-1"
+
+    # Pins are keyed on a hash of the credentials, never the token itself.
+    key = client_key(request_from("Bearer writer"))
+    assert router.is_pinned(key)
+    assert "writer" not in key
+    assert key == client_key(request_from("Bearer writer"))
+
+    clock = mocker.patch("app.db.database.time.monotonic")
+    clock.return_value = 10**9
+    assert await read_as("Bearer writer") == "replica-1"
+
+
+@pytest.mark.asyncio
+async def test_without_replicas_reads_share_the_request_session(servers, mocker):
+    mocker.patch.object(database, "read_router", ReadRouter(servers["primary"]))
+    async with servers["primary"]() as primary:
+        reader = get_read_db(request_from("Bearer reader"), primary)
+        assert await anext(reader) is primary
+        await reader.aclose()
+
+
+def test_principals_are_resolved_on_the_primary():
+    # A replica could still grant a role just revoked.
+    session = inspect.signature(get_current_user).parameters["session"]
+    assert session.default.dependency is get_db
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    executions = 0
+
+    async def read():
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        return {"id": 1}
+
+    waiters = [asyncio.create_task(flight.do(("movie:1",), read)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert executions == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats.calls == 1
+    assert flight.stats.coalesced == 4
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_exceptions_are_fanned_out():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def read():
+        await release.wait()
+        raise LookupError("missing")
+
+    waiters = [asyncio.create_task(flight.do(("movie:1",), read)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert [type(result) for result in results] == [LookupError] * 3
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_the_leader_is_cancelled():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    executions = 0
+
+    async def read():
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        return executions
+
+    leader = asyncio.create_task(flight.do(("movie:1",), read))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flight.do(("movie:1",), read))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiter == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_forget_starts_a_fresh_call_for_later_callers():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    versions = iter(["before write", "after write"])
+
+    async def read():
+        value = next(versions)
+        await release.wait()
+        return value
+
+    early = asyncio.create_task(flight.do(("movie:1", None), read))
+    await asyncio.sleep(0)
+    flight.forget("movie:1")
+    late = asyncio.create_task(flight.do(("movie:1", None), read))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await early == "before write"
+    assert await late == "after write"
+    assert len(flight) == 0
@@ -0,0 +1,39 @@
+from app.core.trigram import TrigramIndex, similarity, trigrams
+
+
+def test_trigrams_match_pg_trgm():
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("a-B") == {"  a", " a ", "  b", " b "}
+    assert similarity(trigrams("word"), trigrams("two words")) == 4 / 11
+
+
+def test_trigram_index_tolerates_typos():
+    index = TrigramIndex()
+    index.rebuild(
+        [(1, "The Godfather"), (2, "The Godfather Part II"), (3, "Goodfellas")]
+    )
+    matches = index.search("godfater")
+    assert [movie_id for _, movie_id in matches] == [1, 2]
+    assert matches[0][0] > matches[1][0]
+    assert index.search("zzzz") == []
+
+
+def test_trigram_index_updates_incrementally():
+    index = TrigramIndex()
+    index.rebuild([(1, "Alien")])
+    index.add(2, "Aliens")
+    index.add(1, "Heat")
+    assert [movie_id for _, movie_id in index.search("alien")] == [2]
+    index.remove(2)
+    assert index.search("alien") == []
+    assert len(index) == 1
+
+
+def test_trigram_index_is_stale_until_built(mocker):
+    clock = mocker.patch("app.core.trigram.time.monotonic", return_value=10.0)
+    index = TrigramIndex()
+    assert index.is_stale(60)
+    index.rebuild([])
+    assert not index.is_stale(60)
+    clock.return_value = 71.0
+    assert index.is_stale(60)
@@ -0,0 +1,63 @@
+import pytest
+
+from app.core import versions as versions_module
+from app.core.cache import LocalSharedClient
+from app.core.config import settings
+from app.core.versions import (
+    LocalVersionStore,
+    SharedVersionStore,
+    build_version_store,
+    etag_matches,
+)
+
+
+@pytest.mark.asyncio
+async def test_local_version_store_bumps_catalog_with_every_key():
+    versions = LocalVersionStore()
+    catalog_etag = await versions.etag()
+    movie_etag = await versions.etag("movie:1")
+
+    await versions.bump("movie:2")
+    assert await versions.etag("movie:1") == movie_etag
+    assert await versions.etag() != catalog_etag
+
+    await versions.bump("movie:1")
+    assert await versions.get("movie:1") == 1
+    assert await versions.get("catalog") == 2
+
+
+@pytest.mark.asyncio
+async def test_version_store_epochs_keep_etags_unique_across_restarts():
+    first, second = LocalVersionStore(), LocalVersionStore()
+    second.epoch = first.epoch + "0"
+    assert await first.etag() != await second.etag()
+
+
+@pytest.mark.asyncio
+async def test_shared_version_store_counts_through_client():
+    client = LocalSharedClient()
+    writer, reader = SharedVersionStore(client), SharedVersionStore(client)
+    await writer.bump("movie:1")
+    await writer.bump("movie:1")
+    assert await reader.get("movie:1") == 2
+    assert await reader.etag("movie:1") == '"s.2"'
+
+
+def test_version_store_is_shared_with_a_redis_url(mocker):
+    assert not build_version_store().shared
+
+    client = LocalSharedClient()
+    mocker.patch.object(settings, "redis_url", "redis://cache:6379/0")
+    mocker.patch.object(versions_module, "shared_client", return_value=client)
+    versions = build_version_store()
+    assert isinstance(versions, SharedVersionStore)
+    assert versions.client is client
+
+
+def test_etag_matches():
+    assert etag_matches('"a.1"', '"a.1"')
+    assert etag_matches('W/"a.1"', '"a.1"')
+    assert etag_matches('"a.0", "a.1"', '"a.1"')
+    assert etag_matches("*", '"a.1"')
+    assert not etag_matches('"a.0"', '"a.1"')
+    assert not etag_matches(None, '"a.1"')